@@ -1,24 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-import bcrypt
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import os
+from app.cache import TTLCache
 from app.database import get_db
 from app.models import User
 
+# Authenticated users are cached by id so session checks skip the users query.
+# Writes through the ORM invalidate immediately in this process; the TTL bounds
+# how long another worker can keep serving a changed or deleted user.
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+
+# bcrypt runs on a dedicated pool (it releases the GIL) instead of the event loop.
+# Beyond PASSWORD_HASH_MAX_PENDING queued + running hashes, requests get a 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+
+
+@dataclass(frozen=True)
+class SessionUser:
+    """Immutable snapshot of an authenticated user, safe to share between requests"""
+
+    id: str
+    username: str
+    password: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "SessionUser":
+        return cls(id=user.id, username=user.username, password=user.password)
+
+
+user_cache = TTLCache(ttl=USER_CACHE_TTL, max_entries=USER_CACHE_MAX_ENTRIES)
+
+
+def cache_user(user: User) -> SessionUser:
+    """Cache a freshly loaded or authenticated user"""
+    session_user = SessionUser.from_user(user)
+    user_cache.set(session_user.id, session_user)
+    return session_user
+
+
+def invalidate_user(user_id: str):
+    """Drop a cached user, e.g. on logout, password change or deletion"""
+    user_cache.invalidate(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
+    import bcrypt  # deferred: only logins and registrations need it
+
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password using bcrypt"""
+    import bcrypt
+
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 
-def get_current_user_from_session(
+class PasswordHasher:
+    """Bounded worker pool for bcrypt with a cap on queued work"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+
+password_hasher = PasswordHasher(
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def get_current_user_from_session(
     request: Request,
-    db: Session = Depends(get_db),
-) -> User:
+    db: AsyncSession = Depends(get_db),
+) -> SessionUser:
     """Get current user from session cookie"""
     user_id = request.session.get("user_id")
     if not user_id:
@@ -26,12 +114,16 @@ def get_current_user_from_session(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
         )
-    
-    user = db.query(User).filter(User.id == user_id).first()
+
+    session_user = user_cache.get(user_id)
+    if session_user is not None:
+        return session_user
+
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    return user
+    return cache_user(user)
 
@@ -0,0 +1,64 @@
+from fastapi import HTTPException, status
+from sqlalchemy import case, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import generate_id
+
+
+def _reject_duplicate_ids(ids: list):
+    if len(set(ids)) != len(ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Duplicate ids in request",
+        )
+
+
+async def bulk_create(db: AsyncSession, model, items: list) -> list:
+    """INSERT all items with one executemany; returns the inserted rows as dicts"""
+    # Ids are generated here so no RETURNING round-trip is needed
+    rows = [{"id": generate_id(), **item} for item in items]
+    if rows:
+        await db.execute(insert(model), rows)
+    return rows
+
+
+async def bulk_update(db: AsyncSession, model, items: list, not_found_detail: str) -> list:
+    """Apply partial updates keyed by id; returns the updated ORM rows in request order.
+
+    One SELECT checks every id exists, one executemany UPDATE writes the
+    changes and one SELECT reads the rows back, whatever the batch size.
+    """
+    ids = [item["id"] for item in items]
+    _reject_duplicate_ids(ids)
+    found = set((await db.scalars(select(model.id).where(model.id.in_(ids)))).all())
+    if len(found) != len(ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=not_found_detail,
+        )
+
+    changes = [item for item in items if len(item) > 1]
+    if changes:
+        # ORM bulk UPDATE by primary key: rows sharing the same set of keys go in one executemany
+        await db.execute(update(model), changes)
+    rows = {row.id: row for row in (await db.scalars(select(model).where(model.id.in_(ids)))).all()}
+    return [rows[row_id] for row_id in ids]
+
+
+async def reorder(db: AsyncSession, model, ids: list, not_found_detail: str):
+    """Set display_order to each id's position in `ids` with a single UPDATE"""
+    _reject_duplicate_ids(ids)
+    if not ids:
+        return
+    result = await db.execute(
+        update(model)
+        .where(model.id.in_(ids))
+        # Keys bound with the id column's type, so they compare as stored ids, not as strings
+        .values(display_order=case({literal(row_id, model.id.type): position for position, row_id in enumerate(ids)}, value=model.id))
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(ids):
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=not_found_detail,
+        )
@@ -0,0 +1,319 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi.responses import Response
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from app.compression import compress, negotiate_encoding, should_compress
+
+# Seconds a cached response stays valid; writes invalidate earlier. 0 disables the cache
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+class CacheEntry:
+    __slots__ = ("body", "expires_at", "variants")
+
+    def __init__(self, body: bytes, expires_at: float):
+        self.body = body
+        self.expires_at = expires_at
+        # Content-Encoding -> compressed body, built on first request for it
+        self.variants = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(variant) for variant in self.variants.values())
+
+
+class ResponseCache:
+    """LRU cache of serialized JSON response bodies, grouped by resource tags.
+
+    Entries are keyed by (tags, key), where the tags name the tables the
+    response was built from (("products",)) and the key distinguishes
+    variants of the same resource (path and query string). Write handlers
+    drop every entry built from a table with invalidate().
+    """
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        # Loads in flight, so concurrent misses for one key share a query
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, tags: tuple, key: str):
+        entry = self._entries.get((tags, key))
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove((tags, key))
+            return None
+        self._entries.move_to_end((tags, key))
+        return entry.body
+
+    def set(self, tags: tuple, key: str, body: bytes):
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        self._remove((tags, key))
+        self._entries[(tags, key)] = CacheEntry(body, time.monotonic() + self.ttl)
+        self._bytes += len(body)
+        self._evict()
+
+    def get_variant(self, tags: tuple, key: str, body: bytes, encoding: str) -> bytes:
+        """`body` compressed with `encoding`, cached alongside the entry it came from"""
+        entry = self._entries.get((tags, key))
+        if entry is None or entry.body is not body:
+            # Not cached, or replaced since: compress without storing
+            return compress(body, encoding)
+        variant = entry.variants.get(encoding)
+        if variant is None:
+            variant = compress(body, encoding)
+            entry.variants[encoding] = variant
+            self._bytes += len(variant)
+            self._evict()
+        return variant
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def invalidate(self, tag: str):
+        """Drop every cached response built from the tagged table"""
+        for cache_key in [cache_key for cache_key in self._entries if tag in cache_key[0]]:
+            self._remove(cache_key)
+        # Loads started before the write must not repopulate the cache
+        for cache_key in [cache_key for cache_key in self._pending if tag in cache_key[0]]:
+            del self._pending[cache_key]
+
+    def clear(self):
+        self._entries.clear()
+        self._pending.clear()
+        self._bytes = 0
+
+    def _remove(self, cache_key):
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    async def get_or_load(self, tags: tuple, key: str, load) -> bytes:
+        """Return the cached body for (tags, key), calling load() on a miss"""
+        body = self.get(tags, key)
+        if body is not None:
+            self.hits += 1
+            return body
+
+        self.misses += 1
+        cache_key = (tags, key)
+        pending = self._pending.get(cache_key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        task = asyncio.ensure_future(load())
+        self._pending[cache_key] = task
+        try:
+            body = await asyncio.shield(task)
+        finally:
+            # Only store the result if no write invalidated the tags meanwhile
+            if self._pending.get(cache_key) is task:
+                del self._pending[cache_key]
+                if task.done() and not task.cancelled() and task.exception() is None:
+                    self.set(tags, key, task.result())
+        return body
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+response_cache = ResponseCache(
+    ttl=RESPONSE_CACHE_TTL,
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+)
+
+
+class TTLCache:
+    """Small LRU mapping whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries.pop(key, None)
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class ContentVersions:
+    """Per-table content version counters backing ETag and Last-Modified.
+
+    ETags come from the tables' versions in the shared cache_versions table
+    (see app/invalidation.py), so every worker gives the same ETag for the
+    same content. Until those versions are known (invalidation off, or not
+    yet polled) the ETag falls back to process-local counters plus an id
+    unique to this process: a restarted or different worker then never
+    reuses an ETag for content it has not seen.
+    """
+
+    def __init__(self):
+        self.instance_id = uuid.uuid4().hex
+        self.started_at = datetime.now(timezone.utc).replace(microsecond=0)
+        self._versions = {}
+        # tag -> version in cache_versions that this process's caches reflect
+        self._shared = {}
+        # Whether _shared holds a full poll, so tags missing from it are at version 0
+        self._synced = False
+        # Versions of this process's own commits, applied once mark_changed has run
+        self._committed = {}
+
+    def sync(self, versions: dict):
+        """Adopt every table's shared version from a complete cache_versions read"""
+        self._shared = dict(versions)
+        self._synced = True
+
+    def observe(self, tag: str, version: int):
+        """The caches now reflect `version` of a table; call after invalidating them"""
+        if version > self._shared.get(tag, 0):
+            self._shared[tag] = version
+
+    def committed(self, tag: str, version: int):
+        """This process committed `version`; takes effect at the next bump(tag)"""
+        self._committed[tag] = max(version, self._committed.get(tag, 0))
+
+    def shared_version(self, tag: str):
+        if tag in self._shared:
+            return self._shared[tag]
+        return 0 if self._synced else None
+
+    def get(self, tag: str):
+        """(version, last_modified) for a table"""
+        return self._versions.get(tag, (0, self.started_at))
+
+    def bump(self, tag: str):
+        version, _ = self.get(tag)
+        self._versions[tag] = (version + 1, datetime.now(timezone.utc).replace(microsecond=0))
+        # Only now, after the caches were updated, may the new version show up in ETags
+        committed = self._committed.pop(tag, None)
+        if committed is not None:
+            self.observe(tag, committed)
+
+    def last_modified(self, tags: tuple) -> datetime:
+        return max(self.get(tag)[1] for tag in tags)
+
+    def etag(self, tags: tuple, key: str) -> str:
+        shared = [self.shared_version(tag) for tag in tags]
+        if None not in shared:
+            versions = ",".join(f"{tag}={version}" for tag, version in zip(tags, shared))
+            seed = f"shared:{versions}:{key}"
+        else:
+            versions = ",".join(f"{tag}={self.get(tag)[0]}" for tag in tags)
+            seed = f"{self.instance_id}:{versions}:{key}"
+        return f'"{hashlib.sha1(seed.encode()).hexdigest()[:32]}"'
+
+
+content_versions = ContentVersions()
+
+
+def mark_changed(tag: str):
+    """Record a committed write to a table: new ETag version, cached responses dropped"""
+    content_versions.bump(tag)
+    response_cache.invalidate(tag)
+
+
+def is_not_modified(request, etag: str, last_modified: datetime) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since for a GET"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since when both are sent
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since
+    return False
+
+
+def cache_key_for(request) -> str:
+    """Cache key for a request: path plus query string"""
+    query = request.url.query
+    return f"{request.url.path}?{query}" if query else request.url.path
+
+
+async def cached_json_response(request, tags, load) -> Response:
+    """Serve a JSON body from the response cache, loading it on a miss.
+
+    tags names the table (or tuple of tables) the body is built from.
+    load() must open its own session and return the serialized body, so a
+    hit touches neither the database nor response_model validation. A
+    conditional GET matching the tables' current versions gets a 304 before
+    the cache is even consulted.
+    """
+    if isinstance(tags, str):
+        tags = (tags,)
+    key = cache_key_for(request)
+    # Read the version before loading: a write racing the load then yields a
+    # stale ETag (forcing a refetch later), never a fresh ETag on stale data
+    last_modified = content_versions.last_modified(tags)
+    headers = {
+        "ETag": content_versions.etag(tags, key),
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=304, headers=headers)
+
+    body = await response_cache.get_or_load(tags, key, load)
+    headers["Vary"] = "Accept-Encoding"
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is not None and should_compress(len(body)):
+        # Compressed once per content version and reused until the next write
+        body = response_cache.get_variant(tags, key, body, encoding)
+        headers["Content-Encoding"] = encoding
+        headers["ETag"] = f"W/{headers['ETag']}"
+    return Response(content=body, media_type="application/json", headers=headers)
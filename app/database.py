@@ -1,7 +1,10 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import CursorResult
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from starlette.concurrency import run_in_threadpool
+from app.pool import describe_pool, get_pool_options, get_single_connection_pool_options
 import os
 import logging
 
@@ -16,38 +19,258 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./morris_timber.db")
 if os.path.exists("/app/data"):
     DATABASE_URL = "sqlite:///./data/morris_timber.db"
 
-# Configure engine based on database type
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL, 
-        connect_args={"check_same_thread": False},
-        poolclass=NullPool  # SQLite doesn't need connection pooling
-    )
-else:
+# How request handlers talk to the database:
+# - "async": AsyncSession on an async engine (aiosqlite / asyncpg), never blocks the event loop
+# - "threadpool": regular sync Session, every call dispatched to the threadpool
+DATABASE_SESSION_MODE = os.getenv("DATABASE_SESSION_MODE", "async").lower()
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# SQLite tuning profile:
+# - "default": driver defaults (rollback journal, every connection may write)
+# - "production": WAL + pragmas below, a pool of query-only read connections
+#   and a single writer connection that serializes every write
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default").lower()
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+if SQLITE_PROFILE not in ("default", "production"):
+    raise ValueError(f"Unknown SQLITE_PROFILE: {SQLITE_PROFILE}")
+
+USE_SQLITE_PRODUCTION = IS_SQLITE and SQLITE_PROFILE == "production"
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection pragmas for the SQLite production profile"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL only fsyncs at checkpoints; a power loss can drop the last commits, never corrupt
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def apply_sqlite_read_pragmas(dbapi_connection, connection_record):
+    apply_sqlite_pragmas(dbapi_connection, connection_record)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def _create_engines(create, url: str, name: str, is_async: bool = False):
+    """(writer, reader) engines for one driver; the same engine unless the SQLite profile splits them"""
+    # Pool class and sizing come from DATABASE_POOL_MODE (see app/pool.py)
+    if IS_SQLITE:
+        connect_args = {} if is_async else {"check_same_thread": False}
+        if not USE_SQLITE_PRODUCTION:
+            writer = create(url, connect_args=connect_args, **get_pool_options(name, is_async))
+            return writer, writer
+        writer = create(
+            url, connect_args=connect_args, **get_single_connection_pool_options(name, is_async)
+        )
+        reader = create(url, connect_args=connect_args, **get_pool_options(f"{name}_read", is_async))
+        event.listen(_sync_engine(writer), "connect", apply_sqlite_pragmas)
+        event.listen(_sync_engine(reader), "connect", apply_sqlite_read_pragmas)
+        return writer, reader
+
     # PostgreSQL or other databases
-    # Use NullPool for serverless to avoid connection pool issues
-    engine = create_engine(
-        DATABASE_URL,
-        poolclass=NullPool,
-        pool_pre_ping=True,  # Verify connections before using
-        echo=False
-    )
-    logger.info(f"Database engine created for: {DATABASE_URL.split('@')[1] if '@' in DATABASE_URL else 'database'}")
+    writer = create(url, echo=False, **get_pool_options(name, is_async))
+    return writer, writer
+
+
+def _sync_engine(engine):
+    """Underlying sync Engine, for event listeners and pool introspection"""
+    return getattr(engine, "sync_engine", engine)
+
+
+_sync = None
+
+
+def _get_sync():
+    """Sync engines and session factories, created on first use.
+
+    In async session mode only schema creation, scripts and pool reporting
+    need them, so a cold start never imports the sync driver (psycopg2).
+    """
+    global _sync
+    if _sync is None:
+        writer, reader = _create_engines(create_engine, DATABASE_URL, "sync")
+        if not IS_SQLITE:
+            logger.info(f"Database engine created for: {DATABASE_URL.split('@')[1] if '@' in DATABASE_URL else 'database'}")
+        _sync = {
+            "engine": writer,
+            "read_engine": reader,
+            "SessionLocal": sessionmaker(autocommit=False, autoflush=False, bind=writer),
+            "ReadSessionLocal": sessionmaker(autocommit=False, autoflush=False, bind=reader),
+        }
+    return _sync
+
+
+def __getattr__(name: str):
+    # engine, read_engine, SessionLocal and ReadSessionLocal are built lazily
+    if name in ("engine", "read_engine", "SessionLocal", "ReadSessionLocal"):
+        return _get_sync()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
-def get_db():
-    """Get database session with error handling"""
-    db = SessionLocal()
+def get_async_database_url(url: str) -> str:
+    """Translate a sync database URL into its async driver equivalent"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            url = "postgresql+asyncpg://" + url[len(prefix):]
+            # asyncpg spells libpq's sslmode as ssl
+            return url.replace("sslmode=", "ssl=")
+    return url
+
+
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+
+if DATABASE_SESSION_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+    async_engine, async_read_engine = _create_engines(
+        create_async_engine, ASYNC_DATABASE_URL, "async", is_async=True
+    )
+    # Objects stay usable after commit; lazy refreshes are not allowed on an AsyncSession
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, autoflush=False, expire_on_commit=False
+    )
+elif DATABASE_SESSION_MODE != "threadpool":
+    raise ValueError(f"Unknown DATABASE_SESSION_MODE: {DATABASE_SESSION_MODE}")
+
+
+class ThreadpoolSession:
+    """Sync Session exposing the awaitable subset of the AsyncSession API.
+
+    Every call that may touch the database runs in the threadpool, so the
+    routers can use the same code in both session modes.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    async def execute(self, statement, *args, **kwargs):
+        def run():
+            result = self.sync_session.execute(statement, *args, **kwargs)
+            if isinstance(result, CursorResult) and not result.returns_rows:
+                return result
+            try:
+                # Buffer rows in the worker thread so iterating them never does I/O
+                return result.freeze()()
+            except NotImplementedError:
+                # ORM bulk INSERT/UPDATE without RETURNING: there are no rows to buffer
+                return result
+
+        return await run_in_threadpool(run)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        result = await self.execute(statement, *args, **kwargs)
+        return result.scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+def create_session(read_only: bool = False):
+    """Open a session for the configured DATABASE_SESSION_MODE.
+
+    read_only sessions may use the read pool (query-only connections under
+    the SQLite production profile) and must not write.
+    """
+    if AsyncSessionLocal is not None:
+        return AsyncReadSessionLocal() if read_only else AsyncSessionLocal()
+    factory = _get_sync()["ReadSessionLocal" if read_only else "SessionLocal"]
+    return ThreadpoolSession(factory(expire_on_commit=False))
+
+
+@asynccontextmanager
+async def session_scope(read_only: bool = False):
+    """Open a session with error handling, inside or outside of dependency injection"""
+    db = create_session(read_only)
     try:
         yield db
     except Exception as e:
         logger.error(f"Database session error: {e}")
-        db.rollback()
+        await db.rollback()
         raise
     finally:
-        db.close()
+        await db.close()
+
+
+async def get_db():
+    """Get database session with error handling"""
+    async with session_scope() as db:
+        yield db
+
+
+async def get_read_db():
+    """Get a read-only database session for handlers that never write"""
+    async with session_scope(read_only=True) as db:
+        yield db
+
+
+def get_dialect():
+    """Dialect of the primary database, without creating the sync engine in async mode"""
+    return (async_engine if async_engine is not None else _get_sync()["engine"]).dialect
+
 
+def get_pool_status() -> dict:
+    """Pool occupancy and checkout metrics for every engine"""
+    engines = {}
+    if _sync is not None:
+        engines.update({"sync": _sync["engine"], "sync_read": _sync["read_engine"]})
+    if async_engine is not None:
+        engines.update({"async": async_engine, "async_read": async_read_engine})
+    pools = {}
+    for name, pool_engine in engines.items():
+        if name.endswith("_read") and pool_engine is engines[name[: -len("_read")]]:
+            continue
+        pools[name] = describe_pool(_sync_engine(pool_engine), name)
+    return pools
@@ -1,27 +1,26 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.models import User
-from app.auth import get_current_user_from_session
+from app.auth import SessionUser, get_current_user_from_session
 
 security = HTTPBearer()
 
 
 def get_current_user(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_from_session),
+    db: AsyncSession = Depends(get_db),
+    current_user: SessionUser = Depends(get_current_user_from_session),
 ):
     """Dependency to get the current authenticated user"""
     return current_user
 
 
-def get_optional_user(
-    db: Session = Depends(get_db),
+async def get_optional_user(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
 ):
     """Dependency to optionally get the current user (returns None if not authenticated)"""
     try:
-        return get_current_user_from_session(db)
-    except:
+        return await get_current_user_from_session(request, db)
+    except HTTPException:
         return None
-
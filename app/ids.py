@@ -0,0 +1,76 @@
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """RFC 9562 UUIDv7: 48-bit Unix time in ms, a 12-bit counter, 62 random bits.
+
+    Ids sort by creation time, so inserts land at the right edge of the
+    primary key index instead of at random pages. The counter keeps ids
+    from one process strictly increasing within a millisecond.
+    """
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            # Random start, leaving room to count up within the millisecond
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return uuid.UUID(int=(ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b)
+
+
+class CompactUUID(TypeDecorator):
+    """UUID primary key: native UUID on PostgreSQL, 16-byte BLOB elsewhere.
+
+    Python values are the canonical text form, so schemas, sessions and the
+    API never see bytes. A value that is not a UUID binds as NULL and so
+    matches no row, which turns malformed ids in URLs into plain 404s.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            raw = value.bytes
+        else:
+            # Cheaper than uuid.UUID() on this hot path; accepts the canonical forms
+            try:
+                raw = bytes.fromhex(value.replace("-", ""))
+            except (AttributeError, ValueError):
+                return None
+            if len(raw) != 16:
+                return None
+        return str(uuid.UUID(bytes=raw)) if dialect.name == "postgresql" else raw
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, memoryview)):
+            h = bytes(value).hex()
+            return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+        # PostgreSQL (as text), or a legacy text id not yet migrated
+        return str(value)
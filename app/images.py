@@ -0,0 +1,346 @@
+"""Uploaded catalog images and their resized derivatives.
+
+An upload is stored once under a content hash, and its URL carries the
+original dimensions:
+
+    /api/images/<digest>-<width>x<height>.<ext>
+
+Each original gets width-bounded WebP and JPEG derivatives next to it:
+
+    /api/images/<digest>-<width>x<height>/<derivative width>.<webp|jpg>
+
+Derivatives are built on a worker pool right after the upload, or on demand
+when one is requested but missing. They live in a disk cache that is
+trimmed, least recently used first, when it outgrows IMAGE_CACHE_MAX_BYTES;
+originals are never evicted. Because srcset URLs follow from the image URL
+alone, list endpoints add them without any I/O.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DIR = os.getenv("IMAGE_DIR", "./data/images" if os.path.exists("/app/data") else "./images")
+# Prefix of the URLs handed out for uploads; an absolute CDN origin works too
+IMAGE_URL_PREFIX = os.getenv("IMAGE_URL_PREFIX", "/api/images").rstrip("/")
+IMAGE_WIDTHS = tuple(sorted({int(width) for width in os.getenv("IMAGE_WIDTHS", "320,640,1024,1600").split(",")}))
+IMAGE_FORMATS = tuple(name.strip() for name in os.getenv("IMAGE_FORMATS", "webp,jpeg").split(","))
+IMAGE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "82"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_MAX_UPLOAD_BYTES = int(os.getenv("IMAGE_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# Larger images are rejected before they are decoded (decompression bombs)
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(50_000_000)))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# A served derivative's mtime is refreshed at most this often; eviction goes by mtime
+IMAGE_CACHE_TOUCH_INTERVAL = 3600
+
+# Derivative format -> (file extension, media type)
+DERIVATIVE_FORMATS = {"webp": ("webp", "image/webp"), "jpeg": ("jpg", "image/jpeg")}
+# Pillow format of an accepted upload -> (file extension, media type)
+ORIGINAL_FORMATS = {"JPEG": ("jpg", "image/jpeg"), "PNG": ("png", "image/png"), "WEBP": ("webp", "image/webp")}
+ORIGINAL_MEDIA_TYPES = dict(ORIGINAL_FORMATS.values())
+DERIVATIVE_MEDIA_TYPES = dict(DERIVATIVE_FORMATS.values())
+
+for _format in IMAGE_FORMATS:
+    if _format not in DERIVATIVE_FORMATS:
+        raise ValueError(f"Unknown IMAGE_FORMATS entry: {_format}")
+
+IMAGE_NAME_RE = re.compile(r"^([0-9a-f]{32})-([1-9]\d{0,5})x([1-9]\d{0,5})$")
+IMAGE_URL_RE = re.compile(r"/([0-9a-f]{32}-[1-9]\d{0,5}x[1-9]\d{0,5})\.(jpg|png|webp)$")
+DERIVATIVE_NAME_RE = re.compile(r"^([1-9]\d{0,5})\.(webp|jpg)$")
+# EXIF orientations that rotate the picture by 90 degrees
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+class ImageError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ImageKey:
+    """An original image: content digest and displayed size"""
+
+    digest: str
+    width: int
+    height: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.digest}-{self.width}x{self.height}"
+
+    @classmethod
+    def parse(cls, name: str) -> Optional["ImageKey"]:
+        match = IMAGE_NAME_RE.match(name)
+        if match is None:
+            return None
+        return cls(match.group(1), int(match.group(2)), int(match.group(3)))
+
+
+def derivative_widths(width: int) -> list:
+    """Widths generated for an original `width` pixels wide (never upscaled)"""
+    return sorted({min(bound, width) for bound in IMAGE_WIDTHS})
+
+
+def image_srcset(url: Optional[str]) -> Optional[dict]:
+    """srcset strings per derivative format for an uploaded image URL, else None"""
+    if not url:
+        return None
+    match = IMAGE_URL_RE.search(url)
+    if match is None:
+        return None
+    base = url[: match.start()] + "/" + match.group(1)
+    width = int(match.group(1).rsplit("-", 1)[1].split("x")[0])
+    widths = derivative_widths(width)
+    srcset = {}
+    for image_format in IMAGE_FORMATS:
+        extension = DERIVATIVE_FORMATS[image_format][0]
+        srcset[image_format] = ", ".join(f"{base}/{size}.{extension} {size}w" for size in widths)
+    return srcset
+
+
+# JSON key of an image URL -> JSON key of its srcset, in list rows
+SRCSET_KEYS = {"image": "imageSrcset", "heroImage": "heroImageSrcset"}
+
+
+def add_srcsets(row: dict) -> dict:
+    """Add srcset keys for the image URLs in a serialized row"""
+    for key, srcset_key in SRCSET_KEYS.items():
+        if key in row:
+            row[srcset_key] = image_srcset(row[key])
+    return row
+
+
+def original_path(key: ImageKey, extension: str) -> str:
+    return os.path.join(IMAGE_DIR, "originals", key.digest[:2], f"{key.digest}.{extension}")
+
+
+def find_original(key: ImageKey) -> Optional[str]:
+    for extension in ORIGINAL_MEDIA_TYPES:
+        path = original_path(key, extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def derivative_path(key: ImageKey, width: int, image_format: str) -> str:
+    extension = DERIVATIVE_FORMATS[image_format][0]
+    return os.path.join(IMAGE_DIR, "cache", key.digest[:2], f"{key.digest}-{width}.{extension}")
+
+
+def write_atomically(path: str, data: bytes):
+    """Write via a temporary file and rename, so readers never see partial files"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def store_original(data: bytes) -> str:
+    """Validate an upload, store it under its content digest and return its URL"""
+    from PIL import Image, UnidentifiedImageError  # deferred: only uploads and resizing need Pillow
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format not in ORIGINAL_FORMATS:
+                raise ImageError(f"Unsupported image format: {image.format}")
+            width, height = image.size
+            if width * height > IMAGE_MAX_PIXELS:
+                raise ImageError(f"Image exceeds {IMAGE_MAX_PIXELS} pixels")
+            if image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+            extension = ORIGINAL_FORMATS[image.format][0]
+            # A full decode catches truncated and corrupt files that verify() lets through
+            image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, SyntaxError, OSError) as e:
+        raise ImageError("Not a valid JPEG, PNG or WebP image") from e
+
+    key = ImageKey(hashlib.sha256(data).hexdigest()[:32], width, height)
+    path = original_path(key, extension)
+    if not os.path.exists(path):
+        write_atomically(path, data)
+    return f"{IMAGE_URL_PREFIX}/{key.name}.{extension}"
+
+
+def render_derivative(source: str, key: ImageKey, width: int, image_format: str) -> bytes:
+    """Resize an original to `width` pixels wide and encode it"""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        transposed = image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS
+        if (image.size[::-1] if transposed else image.size) != (key.width, key.height):
+            # The size in the URL is not this image's: refuse rather than cache a distorted copy
+            raise ImageError(f"{key.name} does not match the stored image")
+        height = max(1, round(key.height * width / key.width))
+        if image.format == "JPEG":
+            # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 while decoding
+            image.draft("RGB", (height, width) if transposed else (width, height))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        if image_format == "jpeg" and image.mode == "RGBA":
+            # JPEG has no alpha channel: flatten onto white
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        if image.size != (width, height):
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        if image_format == "webp":
+            image.save(output, "WEBP", quality=IMAGE_WEBP_QUALITY, method=4)
+        else:
+            image.save(output, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+class DerivativeCache:
+    """Size bound for the derivative directory, evicting least recently used files.
+
+    Recency is the file mtime (refreshed when a file is served), so several
+    worker processes sharing the directory agree on what to evict. Each
+    process tracks the bytes it added since its last scan and rescans once
+    that estimate passes the limit, trimming to 90% of it.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._bytes = None
+        self._lock = threading.Lock()
+
+    def _scan(self) -> list:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def added(self, size: int):
+        """Account for a newly written file and evict if over the limit"""
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(entry[1] for entry in self._scan())
+            else:
+                self._bytes += size
+            if self._bytes <= self.max_bytes:
+                return
+            entries = sorted(self._scan())
+            total = sum(entry[1] for entry in entries)
+            target = self.max_bytes * 0.9
+            evicted = 0
+            for _, file_size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= file_size
+                evicted += 1
+            self._bytes = total
+            if evicted:
+                logger.info(f"Evicted {evicted} cached image derivatives")
+
+    @staticmethod
+    def touch(path: str, mtime: float):
+        """Mark a served file as recently used"""
+        if mtime < time.time() - IMAGE_CACHE_TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+
+
+class ImagePipeline:
+    """Worker pool storing uploads and building their derivatives.
+
+    Pillow releases the GIL while decoding, resizing and encoding, so a thread
+    pool keeps the event loop free. Requests for a derivative that is already
+    being built wait for that build instead of starting another.
+    """
+
+    def __init__(self, workers: int, cache: DerivativeCache):
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="images")
+        # derivative path -> future of the build in progress
+        self._building = {}
+
+    async def store(self, data: bytes) -> str:
+        """Store an upload, start building its derivatives in the background and return its URL"""
+        url = await asyncio.get_running_loop().run_in_executor(self._executor, store_original, data)
+        key = ImageKey.parse(IMAGE_URL_RE.search(url).group(1))
+        for width in derivative_widths(key.width):
+            for image_format in IMAGE_FORMATS:
+                if not os.path.exists(derivative_path(key, width, image_format)):
+                    self._build(key, width, image_format)
+        return url
+
+    def _build(self, key: ImageKey, width: int, image_format: str) -> asyncio.Future:
+        path = derivative_path(key, width, image_format)
+        future = self._building.get(path)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, self._build_sync, key, width, image_format, path
+            )
+            self._building[path] = future
+            future.add_done_callback(lambda done: self._finished(path, done))
+        return future
+
+    def _build_sync(self, key: ImageKey, width: int, image_format: str, path: str):
+        source = find_original(key)
+        if source is None:
+            raise FileNotFoundError(f"No original image for {key.name}")
+        data = render_derivative(source, key, width, image_format)
+        write_atomically(path, data)
+        self.cache.added(len(data))
+
+    def _finished(self, path: str, future: asyncio.Future):
+        self._building.pop(path, None)
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Building image derivative {path} failed: {future.exception()!r}")
+
+    async def derivative(self, key: ImageKey, width: int, image_format: str) -> Optional[str]:
+        """Path of a derivative, building it first if needed; None if there is no such image"""
+        path = derivative_path(key, width, image_format)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if find_original(key) is None:
+                return None
+            try:
+                await asyncio.shield(self._build(key, width, image_format))
+            except ImageError:
+                return None
+            return path
+        self.cache.touch(path, stat.st_mtime)
+        return path
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+image_pipeline = ImagePipeline(
+    workers=IMAGE_WORKERS,
+    cache=DerivativeCache(os.path.join(IMAGE_DIR, "cache"), IMAGE_CACHE_MAX_BYTES),
+)
@@ -0,0 +1,324 @@
+from datetime import datetime, timezone
+from sqlalchemy import insert, select
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+from app.database import session_scope
+from app.models import ContactMessage, generate_id
+
+logger = logging.getLogger(__name__)
+
+# POST /api/contact handling:
+# - "direct": insert and commit inside the request
+# - "queue": spool to disk, enqueue, reply 202; a background task batch-inserts
+CONTACT_INGEST_MODE = os.getenv("CONTACT_INGEST_MODE", "direct").lower()
+CONTACT_QUEUE_SIZE = int(os.getenv("CONTACT_QUEUE_SIZE", "1000"))
+CONTACT_BATCH_SIZE = int(os.getenv("CONTACT_BATCH_SIZE", "100"))
+# Seconds the writer waits to fill a batch after the first message arrives
+CONTACT_FLUSH_INTERVAL = float(os.getenv("CONTACT_FLUSH_INTERVAL", "0.5"))
+# Each process spools to its own <CONTACT_SPOOL_PATH>.<pid>.<start time>
+CONTACT_SPOOL_PATH = os.getenv(
+    "CONTACT_SPOOL_PATH",
+    "./data/contact_spool.jsonl" if os.path.exists("/app/data") else "./contact_spool.jsonl",
+)
+# fsync every spooled message: survives power loss, not just process crashes
+CONTACT_SPOOL_FSYNC = os.getenv("CONTACT_SPOOL_FSYNC", "false").lower() in ("1", "true", "yes")
+# Rewrite the spool once this many bytes at its head are already committed
+CONTACT_SPOOL_COMPACT_BYTES = 1024 * 1024
+
+if CONTACT_INGEST_MODE not in ("direct", "queue"):
+    raise ValueError(f"Unknown CONTACT_INGEST_MODE: {CONTACT_INGEST_MODE}")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class ContactSpool:
+    """Append-only JSON-lines file holding every accepted but uncommitted message.
+
+    Every process writes its own file, `<path>.<pid>.<start time>`, and holds an exclusive
+    flock on it while running, so workers never touch each other's spools.
+    Messages are appended and committed in the same FIFO order, so committed
+    messages always form a prefix of the file. Offsets handed out are logical
+    (they keep growing across truncations); the spool drops the committed
+    prefix once it is the whole file or has grown large.
+
+    All file I/O blocks, so callers on the event loop run these methods in
+    a thread; the lock keeps an append from interleaving with a truncation.
+    """
+
+    def __init__(self, path: str, fsync: bool):
+        self.base_path = path
+        self.path = None
+        self.fsync = fsync
+        # Logical offset of the first byte still in the file
+        self.discarded = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _spool_paths(self) -> list:
+        """Spools of any process (and the single spool of older versions)"""
+        pattern = re.compile(re.escape(self.base_path) + r"(\.\d+\.\d+)?")
+        return sorted(path for path in glob.glob(glob.escape(self.base_path) + "*") if pattern.fullmatch(path))
+
+    def open(self) -> list:
+        """Open this process's spool and adopt the ones left by processes that died.
+
+        Returns (record, offset) pairs for the adopted messages, which are
+        copied into this spool before their old files are removed.
+        """
+        directory = os.path.dirname(self.base_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        orphans = []
+        for path in self._spool_paths():
+            orphan = self._lock_orphan(path)
+            if orphan is not None:
+                orphans.append((path, orphan))
+
+        # The start time keeps the name unique when a restarted process reuses a pid
+        self.path = f"{self.base_path}.{os.getpid()}.{time.time_ns()}"
+        self._file = open(self.path, "wb")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        recovered = []
+        try:
+            for path, orphan in orphans:
+                for record in self._read(orphan):
+                    recovered.append((record, self._write_line(record)))
+            if recovered:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            for path, orphan in orphans:
+                os.unlink(path)
+                if os.path.exists(path + ".compact"):
+                    os.unlink(path + ".compact")
+        finally:
+            for _, orphan in orphans:
+                orphan.close()
+        return recovered
+
+    @staticmethod
+    def _lock_orphan(path: str):
+        """The spool opened and locked, or None while its process is alive (or it is gone)"""
+        try:
+            spool = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # Another process may have adopted and removed it before we got the lock
+            if os.fstat(spool.fileno()).st_ino != os.stat(path).st_ino:
+                raise FileNotFoundError(path)
+        except (BlockingIOError, FileNotFoundError):
+            spool.close()
+            return None
+        return spool
+
+    @staticmethod
+    def _read(spool) -> list:
+        records = []
+        for line in spool:
+            if not line.endswith(b"\n"):
+                # Torn final append from a crash; it was never acknowledged
+                logger.warning("Dropping incomplete contact spool line")
+                break
+            records.append(json.loads(line))
+        return records
+
+    def close(self):
+        if self._file is not None:
+            # Empty once everything queued was written out
+            if self._file.tell() == 0:
+                os.unlink(self.path)
+            self._file.close()
+            self._file = None
+
+    def _write_line(self, record: dict) -> int:
+        self._file.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+        return self.discarded + self._file.tell()
+
+    def append_many(self, records: list) -> list:
+        """Persist records in order with one flush (and fsync), returning the logical offset just past each"""
+        with self._lock:
+            offsets = [self._write_line(record) for record in records]
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        return offsets
+
+    def commit(self, offset: int):
+        """Mark everything up to logical `offset` as written to the database"""
+        with self._lock:
+            self._commit(offset)
+
+    def _commit(self, offset: int):
+        committed = offset - self.discarded
+        size = self._file.tell()
+        if committed >= size:
+            self._file.truncate(0)
+            self._file.seek(0)
+            self.discarded += size
+        elif committed >= CONTACT_SPOOL_COMPACT_BYTES:
+            with open(self.path, "rb") as spool:
+                spool.seek(committed)
+                tail = spool.read()
+            # Swap in the uncommitted tail atomically so a crash cannot lose it
+            compacted_path = self.path + ".compact"
+            compacted = open(compacted_path, "wb")
+            # Locked before it takes the spool's name, so no other process can adopt it
+            fcntl.flock(compacted, fcntl.LOCK_EX)
+            compacted.write(tail)
+            compacted.flush()
+            os.fsync(compacted.fileno())
+            os.replace(compacted_path, self.path)
+            self._file.close()
+            self._file = compacted
+            self.discarded += committed
+
+
+class ContactIngestor:
+    """Bounded in-process queue of contact messages with a batching writer"""
+
+    def __init__(self, spool: ContactSpool, queue_size: int, batch_size: int, flush_interval: float):
+        self.spool = spool
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = None
+        self._task = None
+        # Submissions waiting for the spool: (record, future resolved once spooled and queued)
+        self._unspooled = []
+        # Submitted but not yet in the queue, counted against queue_size
+        self._pending = 0
+        self._spooler = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        recovered = await asyncio.to_thread(self.spool.open)
+        self._task = asyncio.create_task(self._run())
+        if recovered:
+            logger.info(f"Replaying {len(recovered)} spooled contact messages")
+            # Queued ahead of any new submission, so spool order is preserved
+            for record, offset in recovered:
+                await self.queue.put((record, offset, True))
+
+    async def stop(self):
+        """Write out everything queued, then stop the writer"""
+        if self._task is None:
+            return
+        if self._spooler is not None:
+            await self._spooler
+        await self.queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.spool.close()
+
+    async def submit(self, name: str, email: str, company, message: str):
+        """Spool and enqueue a validated message; raises QueueFullError under overload"""
+        if self.queue.qsize() + self._pending >= self.queue_size:
+            raise QueueFullError()
+        record = {
+            "id": generate_id(),
+            "name": name,
+            "email": email,
+            "company": company,
+            "message": message,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "status": "new",
+        }
+        spooled = asyncio.get_running_loop().create_future()
+        self._unspooled.append((record, spooled))
+        self._pending += 1
+        if self._spooler is None:
+            self._spooler = asyncio.create_task(self._spool())
+        await spooled
+
+    async def _spool(self):
+        """Append waiting submissions in a thread, one flush/fsync per group, then queue them.
+
+        Appends finish in queue order, so committed messages stay a prefix of the spool.
+        """
+        try:
+            while self._unspooled:
+                group, self._unspooled = self._unspooled, []
+                try:
+                    offsets = await asyncio.to_thread(self.spool.append_many, [record for record, _ in group])
+                except Exception as e:
+                    self._pending -= len(group)
+                    for _, spooled in group:
+                        if not spooled.done():
+                            spooled.set_exception(e)
+                    continue
+                for (record, spooled), offset in zip(group, offsets):
+                    self.queue.put_nowait((record, offset, False))
+                    self._pending -= 1
+                    # Done already if the request was cancelled; the message is spooled either way
+                    if not spooled.done():
+                        spooled.set_result(None)
+        finally:
+            self._spooler = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            records = [record for record, _, _ in batch]
+            replayed = any(replayed for _, _, replayed in batch)
+            while True:
+                try:
+                    await self._write(records, deduplicate=replayed)
+                    break
+                except Exception as e:
+                    # Keep the batch (it is still spooled) and retry until the database is back
+                    logger.error(f"Failed to write {len(records)} contact messages: {e}")
+                    await asyncio.sleep(1)
+            await asyncio.to_thread(self.spool.commit, batch[-1][1])
+            for _ in batch:
+                self.queue.task_done()
+
+    async def _write(self, records: list, deduplicate: bool = False):
+        """Insert records in one transaction with a single executemany"""
+        rows = [
+            {**record, "created_at": datetime.fromisoformat(record["created_at"])}
+            for record in records
+        ]
+        async with session_scope() as db:
+            if deduplicate:
+                # A crash between commit and spool truncation replays committed rows
+                ids = [row["id"] for row in rows]
+                existing = set(
+                    (await db.scalars(select(ContactMessage.id).where(ContactMessage.id.in_(ids)))).all()
+                )
+                rows = [row for row in rows if row["id"] not in existing]
+            if rows:
+                await db.execute(insert(ContactMessage), rows)
+                await db.commit()
+
+
+contact_ingestor = ContactIngestor(
+    spool=ContactSpool(CONTACT_SPOOL_PATH, CONTACT_SPOOL_FSYNC),
+    queue_size=CONTACT_QUEUE_SIZE,
+    batch_size=CONTACT_BATCH_SIZE,
+    flush_interval=CONTACT_FLUSH_INTERVAL,
+)
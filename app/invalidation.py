@@ -0,0 +1,189 @@
+"""Cross-worker invalidation of the in-process caches.
+
+Each write handler bumps its table's row in cache_versions inside its own
+transaction (publish_change). Every worker polls that small table and, when
+a version moved, drops its cached responses and snapshot for the table;
+the next read reloads them once. On PostgreSQL the bump also sends a NOTIFY,
+which CACHE_INVALIDATION=listen workers receive as soon as the write
+commits, with polling kept as the fallback.
+"""
+from sqlalchemy import event, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+import asyncio
+import logging
+import os
+from app.cache import content_versions, mark_changed
+from app.database import DATABASE_URL, get_dialect, session_scope
+from app.models import CacheVersion
+from app.replicas import replica_router
+from app.snapshots import product_snapshot, site_settings_store, story_panel_snapshot, team_member_snapshot
+
+logger = logging.getLogger(__name__)
+
+# "poll": check cache_versions every CACHE_INVALIDATION_INTERVAL seconds
+# "listen": poll, and also LISTEN for changes on PostgreSQL
+# "off": single-process deployments
+CACHE_INVALIDATION = os.getenv("CACHE_INVALIDATION", "poll").lower()
+CACHE_INVALIDATION_INTERVAL = float(os.getenv("CACHE_INVALIDATION_INTERVAL", "1"))
+NOTIFY_CHANNEL = "cache_invalidation"
+# Seconds between attempts to re-establish the LISTEN connection
+LISTEN_RETRY_DELAY = 5
+
+if CACHE_INVALIDATION not in ("poll", "listen", "off"):
+    raise ValueError(f"Unknown CACHE_INVALIDATION: {CACHE_INVALIDATION}")
+
+# Cache tag -> in-memory copy of that table to drop along with its responses
+CACHED_TABLES = {
+    "products": product_snapshot,
+    "team_members": team_member_snapshot,
+    "story_panels": story_panel_snapshot,
+    "site_settings": site_settings_store,
+}
+
+
+def _bump_statement(dialect, tag: str):
+    if dialect.name in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect.name == "postgresql" else sqlite.insert
+        return (
+            insert(CacheVersion)
+            .values(tag=tag, version=1)
+            .on_conflict_do_update(index_elements=[CacheVersion.tag], set_={"version": CacheVersion.version + 1})
+        )
+    return update(CacheVersion).where(CacheVersion.tag == tag).values(version=CacheVersion.version + 1)
+
+
+async def publish_change(db, tag: str):
+    """Bump a table's shared version inside the caller's transaction; call before commit"""
+    dialect = get_dialect()
+    stmt = _bump_statement(dialect, tag)
+    if dialect.insert_returning and dialect.name in ("postgresql", "sqlite"):
+        version = (await db.execute(stmt.returning(CacheVersion.version))).scalar_one()
+    else:
+        result = await db.execute(stmt)
+        if result.rowcount == 0:
+            db.add(CacheVersion(tag=tag, version=1))
+            await db.flush()
+        version = await db.scalar(select(CacheVersion.version).where(CacheVersion.tag == tag))
+    if dialect.name == "postgresql":
+        # Delivered to listeners when (and only if) the transaction commits
+        await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": NOTIFY_CHANNEL, "payload": f"{tag}:{version}"})
+
+    def committed(session):
+        # This worker applies its own write directly; the poll need not invalidate it again
+        invalidation_bus.committed_locally(tag, version)
+        # ETags move to it in mark_changed, once the handler has updated the caches
+        content_versions.committed(tag, version)
+        replica_router.note_change()
+
+    event.listen(db.sync_session, "after_commit", committed, once=True)
+
+
+def apply_change(tag: str):
+    """Drop everything this worker has cached from a table"""
+    mark_changed(tag)
+    # Replicas may not have the change yet; reload from the primary
+    replica_router.note_change()
+    cached_table = CACHED_TABLES.get(tag)
+    if cached_table is not None:
+        cached_table.invalidate()
+
+
+class InvalidationBus:
+    """Follows cache_versions and invalidates local caches when another worker writes"""
+
+    def __init__(self, mode: str, interval: float):
+        self.mode = mode
+        self.interval = interval
+        # tag -> version already reflected in this worker's caches; None before the first poll
+        self.versions = None
+        # Caches may have been filled before the first successful poll
+        self._unsynced = False
+        self._failing = False
+        self._tasks = []
+
+    async def start(self):
+        if self.mode == "off":
+            return
+        try:
+            await self.poll()
+        except Exception as e:
+            logger.warning(f"Cache invalidation poll failed at startup, retrying in the background: {e}")
+            self._unsynced = True
+        self._tasks.append(asyncio.create_task(self._poll_forever()))
+        if self.mode == "listen":
+            if get_dialect().name == "postgresql":
+                self._tasks.append(asyncio.create_task(self._listen_forever()))
+            else:
+                logger.warning("CACHE_INVALIDATION=listen needs PostgreSQL; polling only")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def poll(self):
+        async with session_scope(read_only=True) as db:
+            rows = (await db.execute(select(CacheVersion.tag, CacheVersion.version))).all()
+        if self.versions is None:
+            self.versions = {tag: version for tag, version in rows}
+            if self._unsynced:
+                for tag in CACHED_TABLES:
+                    apply_change(tag)
+            content_versions.sync(self.versions)
+            return
+        for tag, version in rows:
+            self.observe(tag, version)
+
+    def observe(self, tag: str, version: int):
+        """A table reached `version`; invalidate if that is news to this worker"""
+        if self.versions is None or version <= self.versions.get(tag, 0):
+            return
+        self.versions[tag] = version
+        logger.debug(f"Invalidating cached {tag} (version {version})")
+        apply_change(tag)
+        content_versions.observe(tag, version)
+
+    def committed_locally(self, tag: str, version: int):
+        # Only when no other worker's change came in between, which the poll must still apply
+        if self.versions is not None and self.versions.get(tag, 0) == version - 1:
+            self.versions[tag] = version
+
+    async def _poll_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+                self._failing = False
+            except Exception as e:
+                if not self._failing:
+                    logger.warning(f"Cache invalidation poll failed: {e}")
+                self._failing = True
+
+    def _on_notify(self, connection, pid, channel, payload):
+        tag, _, version = payload.rpartition(":")
+        self.observe(tag, int(version))
+
+    async def _listen_forever(self):
+        import asyncpg  # deferred: only listening workers on PostgreSQL need it
+
+        dsn = make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            closed = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(dsn)
+                try:
+                    connection.add_termination_listener(lambda _: closed.set())
+                    await connection.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                    # Catch up on anything published while not listening
+                    await self.poll()
+                    await closed.wait()
+                finally:
+                    await connection.close()
+            except Exception as e:
+                logger.warning(f"Cache invalidation LISTEN connection failed: {e}")
+            await asyncio.sleep(LISTEN_RETRY_DELAY)
+
+
+invalidation_bus = InvalidationBus(CACHE_INVALIDATION, CACHE_INVALIDATION_INTERVAL)
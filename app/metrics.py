@@ -0,0 +1,195 @@
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import os
+import time
+
+# Latency histogram buckets, in seconds
+METRICS_BUCKETS = tuple(
+    float(bucket) for bucket in os.getenv(
+        "METRICS_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10"
+    ).split(",")
+)
+# Send Server-Timing headers (app and db time) on every response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+
+
+class RequestStats:
+    """SQL work done on behalf of one request"""
+
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+# Set by the middleware; database calls made while serving the request add to it.
+# The object is shared, not copied, so work done in the threadpool or in
+# SQLAlchemy's async greenlets is counted too.
+current_request_stats: ContextVar = ContextVar("current_request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - started.pop()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    started = connection.info.get("query_started") if connection is not None else None
+    stats = current_request_stats.get()
+    if started:
+        elapsed = time.perf_counter() - started.pop()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+
+
+class RouteMetrics:
+    """Cumulative per-route counters and a latency histogram"""
+
+    __slots__ = ("bucket_counts", "count", "seconds", "statements", "db_seconds")
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(METRICS_BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    def observe(self, seconds: float, stats: RequestStats):
+        self.count += 1
+        self.seconds += seconds
+        self.statements += stats.statements
+        self.db_seconds += stats.db_seconds
+        for i, bound in enumerate(METRICS_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+
+class MetricsRegistry:
+    def __init__(self):
+        # (method, route template, status) -> RouteMetrics
+        self.routes = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        key = (method, route, str(status))
+        metrics = self.routes.get(key)
+        if metrics is None:
+            metrics = self.routes[key] = RouteMetrics()
+        metrics.observe(seconds, stats)
+
+    def render(self, extra=()) -> str:
+        """Prometheus text exposition format (version 0.0.4).
+
+        extra holds further (name, type, help, [(labels, value), ...]) families.
+        """
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), metrics in sorted(self.routes.items()):
+            labels = f'method="{method}",route="{_escape(route)}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(METRICS_BUCKETS, metrics.bucket_counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {metrics.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {metrics.seconds:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {metrics.count}")
+
+        for name, attribute, help_text in (
+            ("db_statements_total", "statements", "SQL statements executed while serving requests, by route"),
+            ("db_seconds_total", "db_seconds", "Time spent in SQL statements while serving requests, by route"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (method, route, status), metrics in sorted(self.routes.items()):
+                labels = f'method="{method}",route="{_escape(route)}",status="{status}"'
+                value = getattr(metrics, attribute)
+                lines.append(f"{name}{{{labels}}} {value:.6f}" if isinstance(value, float) else f"{name}{{{labels}}} {value}")
+
+        for name, metric_type, help_text, samples in extra:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape(str(item))}"' for key, item in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics_registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Time each request, count its SQL work and record both under its route template.
+
+    Adds a Server-Timing header (total time to headers, db time and
+    statement count) when SERVER_TIMING is on.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    timing = (
+                        f'app;dur={elapsed_ms:.1f}, '
+                        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries"'
+                    )
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            metrics_registry.observe(
+                scope["method"], route_template(scope), status_code, time.perf_counter() - start, stats
+            )
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, e.g. /api/products/{product_id}.
+
+    Templates, not raw paths, keep label cardinality bounded. The route
+    only knows its path within its router, so the include prefix is taken
+    from the leading segments of the request path.
+    """
+    route_path = getattr(scope.get("route"), "path", None)
+    if route_path is None:
+        return "unmatched"
+    segments = scope["path"].split("/")
+    prefix = "/".join(segments[: len(segments) - len(route_path.split("/")) + 1])
+    return prefix + route_path
@@ -0,0 +1,185 @@
+"""Versioned schema migrations.
+
+Each script in app/migrations/versions/ is named NNNN_description.py and
+defines upgrade(op); applied versions are recorded in the schema_migrations
+table. Scripts must be idempotent (every Operations helper is), so a
+database created before migrations existed is adopted by simply running
+them. Scripts that set TRANSACTIONAL = False run in autocommit mode on
+PostgreSQL, which CREATE INDEX CONCURRENTLY requires.
+
+    python -m app.migrations upgrade
+    python -m app.migrations status
+"""
+from dataclasses import dataclass
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select, text
+from sqlalchemy.exc import DBAPIError
+import importlib
+import logging
+import pathlib
+import re
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIR = pathlib.Path(__file__).parent / "versions"
+VERSION_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.py$")
+# Serializes concurrent upgrades (several workers starting at once) on PostgreSQL
+ADVISORY_LOCK_KEY = 72_140_018
+
+migrations_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migrations_metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    module: object
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "TRANSACTIONAL", True)
+
+    @property
+    def description(self) -> str:
+        return (self.module.__doc__ or self.name).strip().splitlines()[0]
+
+
+def load_migrations() -> list:
+    """Every migration script, ordered by version"""
+    migrations = []
+    for path in sorted(VERSIONS_DIR.glob("*.py")):
+        match = VERSION_FILE_RE.match(path.name)
+        if match is None:
+            continue
+        module = importlib.import_module(f"{__name__}.versions.{path.stem}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module))
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {VERSIONS_DIR}")
+    return migrations
+
+
+class Operations:
+    """Idempotent DDL helpers handed to each migration's upgrade(op)"""
+
+    def __init__(self, connection, autocommit: bool = False):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        # Outside a transaction, so PostgreSQL can build indexes CONCURRENTLY
+        self.autocommit = autocommit
+
+    def execute(self, statement, parameters=None):
+        if isinstance(statement, str):
+            statement = text(statement)
+        return self.connection.execute(statement, parameters)
+
+    def create_table(self, table: Table):
+        """CREATE TABLE, skipped when it exists. Indexes are left to create_index"""
+        table.create(self.connection, checkfirst=True)
+
+    def create_index(self, name: str, table_name: str, *columns: str, unique: bool = False, using: str = None):
+        """CREATE INDEX IF NOT EXISTS, CONCURRENTLY on PostgreSQL in TRANSACTIONAL = False scripts.
+
+        columns are SQL: column names or, for expression indexes, expressions.
+        """
+        concurrently = ""
+        if self.dialect == "postgresql" and self.autocommit:
+            concurrently = " CONCURRENTLY"
+            # A failed CONCURRENTLY build leaves an INVALID index behind; IF NOT EXISTS would keep it
+            invalid = self.connection.scalar(
+                text(
+                    "SELECT NOT i.indisvalid FROM pg_index i "
+                    "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+                ),
+                {"name": name},
+            )
+            if invalid:
+                self.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        self.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX{concurrently} IF NOT EXISTS {name} "
+            f"ON {table_name}{f' USING {using}' if using else ''} ({', '.join(columns)})"
+        )
+
+
+def applied_versions(connection) -> set:
+    """Versions recorded in schema_migrations (empty before the first upgrade)"""
+    try:
+        return set(connection.scalars(select(schema_migrations.c.version)))
+    except DBAPIError:
+        connection.rollback()
+        return set()
+
+
+def pending_migrations(connection) -> list:
+    applied = applied_versions(connection)
+    return [migration for migration in load_migrations() if migration.version not in applied]
+
+
+def get_engine():
+    """Sync engine for DDL, whatever the DATABASE_SESSION_MODE"""
+    from app.database import engine  # created on first access
+
+    return engine
+
+
+def upgrade(target: int = None, engine=None) -> list:
+    """Apply pending migrations up to `target` (default: all); returns those applied"""
+    engine = engine or get_engine()
+    if engine.dialect.name != "postgresql":
+        return _upgrade(engine, target, is_postgres=False)
+    with engine.connect() as lock_connection:
+        lock_connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        lock_connection.commit()
+        try:
+            return _upgrade(engine, target, is_postgres=True)
+        finally:
+            lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            lock_connection.commit()
+
+
+def _upgrade(engine, target, is_postgres: bool) -> list:
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+    with engine.connect() as connection:
+        pending = pending_migrations(connection)
+    applied = []
+    for migration in pending:
+        if target is not None and migration.version > target:
+            break
+        _apply(engine, migration, is_postgres)
+        applied.append(migration)
+    return applied
+
+
+def _apply(engine, migration: Migration, is_postgres: bool):
+    logger.info(f"Applying migration {migration.version:04d}: {migration.description}")
+    record = insert(schema_migrations).values(version=migration.version, name=migration.name)
+    if migration.transactional or not is_postgres:
+        with engine.begin() as connection:
+            migration.module.upgrade(Operations(connection))
+            connection.execute(record)
+        return
+    with engine.connect() as connection:
+        autocommit = connection.execution_options(isolation_level="AUTOCOMMIT")
+        migration.module.upgrade(Operations(autocommit, autocommit=True))
+        autocommit.execute(record)
+
+
+def report_pending(engine=None) -> list:
+    """Log pending migrations without running any DDL; returns them"""
+    engine = engine or get_engine()
+    with engine.connect() as connection:
+        pending = pending_migrations(connection)
+    if pending:
+        versions = ", ".join(f"{migration.version:04d}_{migration.name}" for migration in pending)
+        logger.warning(f"Database schema has {len(pending)} pending migration(s): {versions}. "
+                       "Run `python -m app.migrations upgrade`")
+    else:
+        logger.info("Database schema is up to date")
+    return pending
@@ -0,0 +1,70 @@
+"""Command line for schema migrations.
+
+    python -m app.migrations upgrade [--target N]   apply pending migrations
+    python -m app.migrations status                 list migrations and whether each is applied
+    python -m app.migrations check                  exit 1 if any migration is pending
+    python -m app.migrations new "add foo column"   create the next versioned script
+"""
+import argparse
+import logging
+import re
+import sys
+from app.migrations import VERSIONS_DIR, applied_versions, load_migrations, report_pending, upgrade, get_engine
+
+TEMPLATE = '''"""{description}"""
+
+# Set TRANSACTIONAL = False when the script creates indexes, so they are built
+# CONCURRENTLY on PostgreSQL
+TRANSACTIONAL = True
+
+
+def upgrade(op):
+    pass
+'''
+
+
+def command_upgrade(args):
+    applied = upgrade(target=args.target)
+    print(f"Applied {len(applied)} migration(s)" if applied else "Nothing to apply")
+
+
+def command_status(args):
+    with get_engine().connect() as connection:
+        applied = applied_versions(connection)
+    for migration in load_migrations():
+        state = "applied" if migration.version in applied else "pending"
+        print(f"{migration.version:04d}  {state:<8} {migration.description}")
+
+
+def command_check(args):
+    sys.exit(1 if report_pending() else 0)
+
+
+def command_new(args):
+    migrations = load_migrations()
+    version = (migrations[-1].version + 1) if migrations else 1
+    slug = re.sub(r"\W+", "_", args.description.lower()).strip("_")
+    path = VERSIONS_DIR / f"{version:04d}_{slug}.py"
+    path.write_text(TEMPLATE.format(description=args.description))
+    print(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--target", type=int, help="stop after this version")
+    upgrade_parser.set_defaults(handler=command_upgrade)
+    commands.add_parser("status", help="list migrations").set_defaults(handler=command_status)
+    commands.add_parser("check", help="exit 1 if migrations are pending").set_defaults(handler=command_check)
+    new_parser = commands.add_parser("new", help="create the next migration script")
+    new_parser.add_argument("description")
+    new_parser.set_defaults(handler=command_new)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Initial tables: users, products, team members, story panels, site settings, contact messages"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text, func
+
+metadata = MetaData()
+
+users = Table(
+    "users",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("username", String, nullable=False),
+    Column("password", String, nullable=False),
+)
+
+products = Table(
+    "products",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("species", String, nullable=False),
+    Column("dimensions", String, nullable=False),
+    Column("origin", String, nullable=False),
+    Column("story", Text, nullable=False),
+    Column("image", String, nullable=False),
+    Column("category", String, nullable=False),
+    Column("display_order", Integer),
+)
+
+team_members = Table(
+    "team_members",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("title", String, nullable=False),
+    Column("bio", Text, nullable=False),
+    Column("image", String, nullable=False),
+    Column("display_order", Integer),
+)
+
+story_panels = Table(
+    "story_panels",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("title", String, nullable=False),
+    Column("description", Text, nullable=False),
+    Column("image", String, nullable=False),
+    Column("display_order", Integer),
+)
+
+site_settings = Table(
+    "site_settings",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("hero_title", String, nullable=False),
+    Column("hero_subtitle", String, nullable=False),
+    Column("hero_image", String, nullable=False),
+    Column("mission_title", String, nullable=False),
+    Column("mission_description", Text, nullable=False),
+    Column("contact_phone", String, nullable=False),
+    Column("contact_email", String, nullable=True),
+)
+
+contact_messages = Table(
+    "contact_messages",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("email", String, nullable=False),
+    Column("company", String, nullable=True),
+    Column("message", Text, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("status", String),
+)
+
+
+def upgrade(op):
+    for table in metadata.sorted_tables:
+        op.create_table(table)
+    op.create_index("ix_users_username", "users", "username", unique=True)
@@ -0,0 +1,14 @@
+"""Indexes for ordered listings, keyset pagination and the contact inbox"""
+
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction
+TRANSACTIONAL = False
+
+
+def upgrade(op):
+    op.create_index("ix_products_display_order_id", "products", "display_order", "id")
+    op.create_index("ix_products_category_display_order_id", "products", "category", "display_order", "id")
+    op.create_index("ix_products_species_display_order_id", "products", "species", "display_order", "id")
+    op.create_index("ix_team_members_display_order_id", "team_members", "display_order", "id")
+    op.create_index("ix_story_panels_display_order_id", "story_panels", "display_order", "id")
+    op.create_index("ix_contact_messages_created_at_id", "contact_messages", "created_at", "id")
+    op.create_index("ix_contact_messages_status_created_at_id", "contact_messages", "status", "created_at", "id")
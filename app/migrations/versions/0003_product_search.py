@@ -0,0 +1,44 @@
+"""Full-text search index over product name, species, origin and story"""
+
+TRANSACTIONAL = False
+
+SEARCH_COLUMNS = "name, species, origin, story"
+NEW_VALUES = "new.name, new.species, new.origin, new.story"
+OLD_VALUES = "old.name, old.species, old.origin, old.story"
+
+# SQLite: an external-content FTS5 table kept in sync by triggers. Only text
+# changes touch the index, so reorders and display_order edits stay cheap
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    f"{SEARCH_COLUMNS}, content='products', content_rowid='rowid', tokenize='porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN "
+    f"INSERT INTO products_fts(rowid, {SEARCH_COLUMNS}) VALUES (new.rowid, {NEW_VALUES}); END",
+    f"CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN "
+    f"INSERT INTO products_fts(products_fts, rowid, {SEARCH_COLUMNS}) VALUES ('delete', old.rowid, {OLD_VALUES}); END",
+    f"CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF {SEARCH_COLUMNS} ON products BEGIN "
+    f"INSERT INTO products_fts(products_fts, rowid, {SEARCH_COLUMNS}) VALUES ('delete', old.rowid, {OLD_VALUES}); "
+    f"INSERT INTO products_fts(rowid, {SEARCH_COLUMNS}) VALUES (new.rowid, {NEW_VALUES}); END",
+)
+
+# PostgreSQL: must stay identical to app.search.product_search_document so
+# the planner matches queries to the index
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('english'::regconfig, name), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, species), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, origin), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, story), 'D')"
+)
+
+
+def upgrade(op):
+    if op.dialect == "sqlite":
+        existed = op.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+        ).first() is not None
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+        if not existed:
+            # Index rows written before search existed
+            op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+    elif op.dialect == "postgresql":
+        op.create_index("ix_products_search", "products", f"({POSTGRES_DOCUMENT})", using="gin")
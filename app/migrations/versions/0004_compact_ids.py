@@ -0,0 +1,35 @@
+"""Store ids as native UUID on PostgreSQL and 16-byte BLOBs on SQLite"""
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+TABLES = ("users", "products", "team_members", "story_panels", "site_settings", "contact_messages")
+BATCH_SIZE = 1000
+
+
+def upgrade(op):
+    if op.dialect == "postgresql":
+        for table in TABLES:
+            data_type = op.execute(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_name = :table AND column_name = 'id'",
+                {"table": table},
+            ).scalar()
+            if data_type != "uuid":
+                # Rewrites the table under an exclusive lock; fails on ids that are not UUIDs
+                op.execute(f"ALTER TABLE {table} ALTER COLUMN id TYPE uuid USING id::uuid")
+        return
+
+    # SQLite cannot change a column's declared type, but a BLOB value is
+    # stored as-is under any affinity, so converting the values is enough
+    for table in TABLES:
+        legacy = [row[0] for row in op.execute(f"SELECT id FROM {table} WHERE typeof(id) = 'text'")]
+        converted = []
+        for text_id in legacy:
+            try:
+                converted.append({"new": uuid.UUID(text_id).bytes, "old": text_id})
+            except ValueError:
+                logger.warning(f"Leaving non-UUID id {text_id!r} in {table} as text")
+        for start in range(0, len(converted), BATCH_SIZE):
+            op.execute(f"UPDATE {table} SET id = :new WHERE id = :old", converted[start:start + BATCH_SIZE])
@@ -0,0 +1,35 @@
+"""Seed the site settings row and remove duplicates left by racing first page loads"""
+import logging
+from sqlalchemy import bindparam, text
+from app.ids import CompactUUID, uuid7
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "hero_title": "Welcome to Morris Timber Co",
+    "hero_subtitle": "Premium Timber Products",
+    "hero_image": "",
+    "mission_title": "Our Mission",
+    "mission_description": "Delivering quality timber products",
+    "contact_phone": "",
+    "contact_email": None,
+}
+
+
+def upgrade(op):
+    # Physical order: the row that the unordered LIMIT 1 reads have been serving
+    physical_order = "ctid" if op.dialect == "postgresql" else "rowid"
+    ids = [row[0] for row in op.execute(f"SELECT id FROM site_settings ORDER BY {physical_order}")]
+    if not ids:
+        columns = ", ".join(DEFAULTS)
+        values = ", ".join(f":{name}" for name in DEFAULTS)
+        op.execute(
+            text(f"INSERT INTO site_settings (id, {columns}) VALUES (:id, {values})").bindparams(
+                bindparam("id", type_=CompactUUID)
+            ),
+            {"id": str(uuid7()), **DEFAULTS},
+        )
+        return
+    if len(ids) > 1:
+        logger.warning(f"Deleting {len(ids) - 1} duplicate site settings row(s)")
+        op.execute("DELETE FROM site_settings WHERE id = :id", [{"id": row_id} for row_id in ids[1:]])
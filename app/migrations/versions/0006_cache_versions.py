@@ -0,0 +1,15 @@
+"""Per-table change counters that workers poll to invalidate their caches"""
+from sqlalchemy import BigInteger, Column, MetaData, String, Table
+
+metadata = MetaData()
+
+cache_versions = Table(
+    "cache_versions",
+    metadata,
+    Column("tag", String, primary_key=True),
+    Column("version", BigInteger, nullable=False),
+)
+
+
+def upgrade(op):
+    op.create_table(cache_versions)
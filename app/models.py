@@ -1,17 +1,18 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text
+from sqlalchemy import BigInteger, Column, String, Integer, DateTime, Text, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from app.database import Base
-import uuid
+from app.ids import CompactUUID, uuid7
 
 
 def generate_id():
-    return str(uuid.uuid4())
+    return str(uuid7())
 
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(String, primary_key=True, default=generate_id)
+    id = Column(CompactUUID, primary_key=True, default=generate_id)
     username = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)  # Will store hashed password
 
@@ -19,7 +20,7 @@ class User(Base):
 class Product(Base):
     __tablename__ = "products"
 
-    id = Column(String, primary_key=True, default=generate_id)
+    id = Column(CompactUUID, primary_key=True, default=generate_id)
     name = Column(String, nullable=False)
     species = Column(String, nullable=False)
     dimensions = Column(String, nullable=False)
@@ -29,32 +30,43 @@ class Product(Base):
     category = Column(String, nullable=False)
     display_order = Column(Integer, default=0)
 
+    # Keyset pagination on (display_order, id), optionally filtered by category or species
+    __table_args__ = (
+        Index("ix_products_display_order_id", "display_order", "id"),
+        Index("ix_products_category_display_order_id", "category", "display_order", "id"),
+        Index("ix_products_species_display_order_id", "species", "display_order", "id"),
+    )
+
 
 class TeamMember(Base):
     __tablename__ = "team_members"
 
-    id = Column(String, primary_key=True, default=generate_id)
+    id = Column(CompactUUID, primary_key=True, default=generate_id)
     name = Column(String, nullable=False)
     title = Column(String, nullable=False)
     bio = Column(Text, nullable=False)
     image = Column(String, nullable=False)
     display_order = Column(Integer, default=0)
 
+    __table_args__ = (Index("ix_team_members_display_order_id", "display_order", "id"),)
+
 
 class StoryPanel(Base):
     __tablename__ = "story_panels"
 
-    id = Column(String, primary_key=True, default=generate_id)
+    id = Column(CompactUUID, primary_key=True, default=generate_id)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
     image = Column(String, nullable=False)
     display_order = Column(Integer, default=0)
 
+    __table_args__ = (Index("ix_story_panels_display_order_id", "display_order", "id"),)
+
 
 class SiteSettings(Base):
     __tablename__ = "site_settings"
 
-    id = Column(String, primary_key=True, default=generate_id)
+    id = Column(CompactUUID, primary_key=True, default=generate_id)
     hero_title = Column(String, nullable=False)
     hero_subtitle = Column(String, nullable=False)
     hero_image = Column(String, nullable=False)
@@ -67,11 +79,30 @@ class SiteSettings(Base):
 class ContactMessage(Base):
     __tablename__ = "contact_messages"
 
-    id = Column(String, primary_key=True, default=generate_id)
+    id = Column(CompactUUID, primary_key=True, default=generate_id)
     name = Column(String, nullable=False)
     email = Column(String, nullable=False)
     company = Column(String, nullable=True)
     message = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # SQLite stores CURRENT_TIMESTAMP without microseconds; bind parameters in
+    # the same format so keyset comparisons against stored values line up
+    created_at = Column(
+        DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite"),
+        server_default=func.now(),
+    )
     status = Column(String, default="new")  # new, read, replied, archived
 
+    # Admin inbox: newest first, optionally filtered by status
+    __table_args__ = (
+        Index("ix_contact_messages_created_at_id", "created_at", "id"),
+        Index("ix_contact_messages_status_created_at_id", "status", "created_at", "id"),
+    )
+
+
+class CacheVersion(Base):
+    """Shared change counter per cached table, polled by every worker"""
+
+    __tablename__ = "cache_versions"
+
+    tag = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
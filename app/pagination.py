@@ -0,0 +1,38 @@
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+import base64
+import json
+
+
+def encode_cursor(values) -> str:
+    """Opaque cursor for the sort key of the last row on a page"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> list:
+    """Decode a cursor made by encode_cursor, rejecting anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != length:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return values
+
+
+def keyset_after(columns, values, descending: bool = False):
+    """WHERE clause selecting rows strictly after `values` in (columns...) order.
+
+    Spelled out as nested OR/AND rather than a row-value comparison so it
+    works on every backend.
+    """
+    clause = None
+    for column, value in reversed(list(zip(columns, values))):
+        after = column < value if descending else column > value
+        clause = after if clause is None else or_(after, and_(column == value, clause))
+    return clause
@@ -0,0 +1,127 @@
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+import os
+import threading
+import time
+
+# Connection pooling profile:
+# - "queue": sized QueuePool for long-lived workers (Docker, uvicorn)
+# - "null": open/close a connection per checkout, for serverless (Vercel)
+# Vercel sets VERCEL=1 in every function, so it gets NullPool unless overridden
+DATABASE_POOL_MODE = os.getenv(
+    "DATABASE_POOL_MODE", "null" if os.getenv("VERCEL") else "queue"
+).lower()
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+# Recycling already retires stale connections; pre-ping costs a round-trip per checkout
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+
+if DATABASE_POOL_MODE not in ("queue", "null"):
+    raise ValueError(f"Unknown DATABASE_POOL_MODE: {DATABASE_POOL_MODE}")
+
+
+class PoolStats:
+    """Checkout counters and wait times for one engine's pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+
+# Stats per engine name ("sync", "async"), filled in by the instrumented pools
+pool_stats = {}
+
+
+class _InstrumentedPoolMixin:
+    stats_name = "default"
+
+    def _do_get(self):
+        stats = pool_stats.setdefault(self.stats_name, PoolStats())
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            stats.record_timeout()
+            raise
+        stats.record_wait(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def get_pool_options(stats_name: str, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine / create_async_engine for the pool mode"""
+    if DATABASE_POOL_MODE == "null":
+        return {"poolclass": NullPool}
+
+    base = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+    # Subclass per engine so each pool reports under its own name
+    poolclass = type(base.__name__, (base,), {"stats_name": stats_name})
+    pool_stats.setdefault(stats_name, PoolStats())
+    return {
+        "poolclass": poolclass,
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_timeout": DATABASE_POOL_TIMEOUT,
+        "pool_recycle": DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": DATABASE_POOL_PRE_PING,
+    }
+
+
+def get_single_connection_pool_options(stats_name: str, is_async: bool = False) -> dict:
+    """Pool holding exactly one connection: callers queue for it, serializing their work"""
+    base = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+    poolclass = type(base.__name__, (base,), {"stats_name": stats_name})
+    pool_stats.setdefault(stats_name, PoolStats())
+    return {
+        "poolclass": poolclass,
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": DATABASE_POOL_TIMEOUT,
+        "pool_recycle": DATABASE_POOL_RECYCLE,
+    }
+
+
+def describe_pool(engine, stats_name: str) -> dict:
+    """Current occupancy plus cumulative checkout stats for an engine's pool"""
+    pool = engine.pool
+    description = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        description.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # Negative while the pool is still filling up to pool_size
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+        )
+    stats = pool_stats.get(stats_name)
+    if stats is not None:
+        description.update(
+            checkouts=stats.checkouts,
+            timeouts=stats.timeouts,
+            wait_seconds_total=round(stats.wait_seconds_total, 6),
+            wait_seconds_max=round(stats.wait_seconds_max, 6),
+        )
+    return description
@@ -0,0 +1,294 @@
+"""Routing of public catalog reads to read replicas.
+
+With DATABASE_READ_URLS set, the loaders behind the public GET endpoints
+(product listings and search, the table snapshots, site settings) open their
+sessions through replica_session(), which picks a healthy replica. Writes,
+admin reads, authentication and the cache_versions poll keep using the
+primary. Reads also stay on the primary:
+
+- for DATABASE_READ_MAX_LAG seconds after this worker commits or learns of a
+  write to a cached table, so caches are never refilled with the old rows;
+- for requests from a client session that wrote within that window, so an
+  admin sees their own change on the next page load;
+- when no replica is healthy. A background check runs every
+  DATABASE_READ_HEALTH_INTERVAL seconds and takes replicas that fail, or
+  lag the primary by more than DATABASE_READ_MAX_LAG, out of rotation.
+"""
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+import asyncio
+import itertools
+import logging
+import os
+import time
+from app.database import (
+    DATABASE_SESSION_MODE,
+    ThreadpoolSession,
+    _sync_engine,
+    get_async_database_url,
+    session_scope,
+)
+from app.pool import describe_pool, get_pool_options
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated replica URLs, in the same form as DATABASE_URL
+DATABASE_READ_URLS = [url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()]
+# - "round_robin": replicas take turns
+# - "least_connections": the replica with the fewest sessions open from this worker
+DATABASE_READ_SELECTION = os.getenv("DATABASE_READ_SELECTION", "round_robin").lower()
+DATABASE_READ_HEALTH_INTERVAL = float(os.getenv("DATABASE_READ_HEALTH_INTERVAL", "5"))
+DATABASE_READ_HEALTH_TIMEOUT = float(os.getenv("DATABASE_READ_HEALTH_TIMEOUT", "2"))
+# Largest replication lag tolerated, and how long reads stay on the primary after a write
+DATABASE_READ_MAX_LAG = float(os.getenv("DATABASE_READ_MAX_LAG", "5"))
+
+if DATABASE_READ_SELECTION not in ("round_robin", "least_connections"):
+    raise ValueError(f"Unknown DATABASE_READ_SELECTION: {DATABASE_READ_SELECTION}")
+
+# Seconds behind the primary; 0 when the replica has replayed everything it received
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+# Session key holding the time until which a client's reads stay on the primary
+PRIMARY_READS_SESSION_KEY = "primary_reads_until"
+
+# Set by ReadYourWritesMiddleware for requests from a client that wrote recently
+read_from_primary: ContextVar = ContextVar("read_from_primary", default=False)
+
+
+def _query_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+class Replica:
+    """One read replica: its engine, health and the sessions open on it"""
+
+    def __init__(self, index: int, url: str):
+        self.name = f"replica{index}"
+        self.host = make_url(url).render_as_string(hide_password=True)
+        is_sqlite = url.startswith("sqlite")
+        if DATABASE_SESSION_MODE == "async":
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            self.pool_name = f"async_{self.name}"
+            self.engine = create_async_engine(get_async_database_url(url), **get_pool_options(self.pool_name, True))
+            self._factory = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        else:
+            self.pool_name = f"sync_{self.name}"
+            connect_args = {"check_same_thread": False} if is_sqlite else {}
+            self.engine = create_engine(url, connect_args=connect_args, **get_pool_options(self.pool_name))
+            self._factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        if is_sqlite:
+            event.listen(_sync_engine(self.engine), "connect", _query_only)
+        # Unused until the first health check passes
+        self.healthy = False
+        self.lag = None
+        self.last_error = None
+        self.in_flight = 0
+
+    def create_session(self):
+        if DATABASE_SESSION_MODE == "async":
+            return self._factory()
+        return ThreadpoolSession(self._factory(expire_on_commit=False))
+
+    async def measure_lag(self) -> float:
+        db = self.create_session()
+        try:
+            if self.engine.dialect.name == "postgresql":
+                return float(await db.scalar(POSTGRES_LAG_QUERY) or 0)
+            await db.execute(text("SELECT 1"))
+            return 0.0
+        finally:
+            await db.close()
+
+    def describe(self) -> dict:
+        return {
+            "url": self.host,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "in_flight": self.in_flight,
+            "last_error": self.last_error,
+            "pool": describe_pool(_sync_engine(self.engine), self.pool_name),
+        }
+
+
+class ReplicaRouter:
+    """Chooses where each public read goes and keeps the replicas' health current"""
+
+    def __init__(self, urls: list, selection: str, interval: float, timeout: float, max_lag: float):
+        self.replicas = [Replica(index, url) for index, url in enumerate(urls)]
+        self.selection = selection
+        self.interval = interval
+        self.timeout = timeout
+        self.max_lag = max_lag
+        self._turn = itertools.count()
+        # Monotonic time until which this worker's reads stay on the primary
+        self._primary_until = 0.0
+        self._task = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    async def start(self):
+        if not self.enabled:
+            return
+        await self.check_all()
+        self._task = asyncio.create_task(self._check_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for replica in self.replicas:
+            if DATABASE_SESSION_MODE == "async":
+                await replica.engine.dispose()
+            else:
+                replica.engine.dispose()
+
+    async def check_all(self):
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def check(self, replica: Replica):
+        try:
+            replica.lag = await asyncio.wait_for(replica.measure_lag(), self.timeout)
+        except Exception as e:
+            replica.lag = None
+            self._mark_unhealthy(replica, repr(e))
+            return
+        if replica.lag > self.max_lag:
+            self._mark_unhealthy(replica, f"lagging {replica.lag:.1f}s behind the primary")
+        elif not replica.healthy:
+            logger.info(f"Read replica {replica.name} is healthy")
+            replica.healthy = True
+            replica.last_error = None
+
+    def _mark_unhealthy(self, replica: Replica, reason: str):
+        if replica.healthy or replica.last_error is None:
+            logger.warning(f"Read replica {replica.name} taken out of rotation: {reason}")
+        replica.healthy = False
+        replica.last_error = reason
+
+    async def _check_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check_all()
+
+    def note_change(self):
+        """A cached table changed: read from the primary until every replica has it"""
+        self._primary_until = time.monotonic() + self.max_lag
+
+    def choose(self):
+        """A healthy replica, or None when reads must go to the primary"""
+        if read_from_primary.get() or time.monotonic() < self._primary_until:
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        turn = next(self._turn)
+        if self.selection == "least_connections":
+            # Rotating the start breaks ties, so idle replicas still share the load
+            rotated = healthy[turn % len(healthy):] + healthy[: turn % len(healthy)]
+            return min(rotated, key=lambda replica: replica.in_flight)
+        return healthy[turn % len(healthy)]
+
+    async def _open(self, replica: Replica):
+        """A session holding a replica connection, or None if the replica cannot be reached"""
+        db = replica.create_session()
+        try:
+            # Connect before handing the session out, so a dead replica falls back to the primary
+            await db.run_sync(lambda session: session.connection())
+            return db
+        except Exception as e:
+            await db.close()
+            self._mark_unhealthy(replica, repr(e))
+            return None
+
+    @asynccontextmanager
+    async def session_scope(self):
+        replica = self.choose() if self.enabled else None
+        db = None
+        if replica is not None:
+            replica.in_flight += 1
+            db = await self._open(replica)
+            if db is None:
+                replica.in_flight -= 1
+        if db is None:
+            async with session_scope(read_only=True) as db:
+                yield db
+            return
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error on read replica {replica.name}: {e}")
+            if isinstance(e, DBAPIError) and e.connection_invalidated:
+                self._mark_unhealthy(replica, repr(e))
+            await db.rollback()
+            raise
+        finally:
+            replica.in_flight -= 1
+            await db.close()
+
+    def status(self) -> dict:
+        return {replica.name: replica.describe() for replica in self.replicas}
+
+
+replica_router = ReplicaRouter(
+    DATABASE_READ_URLS,
+    DATABASE_READ_SELECTION,
+    DATABASE_READ_HEALTH_INTERVAL,
+    DATABASE_READ_HEALTH_TIMEOUT,
+    DATABASE_READ_MAX_LAG,
+)
+
+
+def replica_session():
+    """Read-only session for public catalog reads: a replica when one may serve it, else the primary"""
+    return replica_router.session_scope()
+
+
+async def get_replica_db():
+    """Get a session for public GET handlers that tolerate replica reads"""
+    async with replica_session() as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """Keep a client's reads on the primary for a while after it sends a write.
+
+    Must run inside SessionMiddleware; the deadline is stored in the client's
+    session, so it holds whichever worker the next request reaches.
+    """
+
+    def __init__(self, app, window: float = DATABASE_READ_MAX_LAG):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        session = scope.get("session")
+        token = None
+        if session is not None:
+            if scope["method"] not in ("GET", "HEAD", "OPTIONS"):
+                session[PRIMARY_READS_SESSION_KEY] = time.time() + self.window
+            deadline = session.get(PRIMARY_READS_SESSION_KEY)
+            if deadline is not None:
+                if deadline > time.time():
+                    token = read_from_primary.set(True)
+                else:
+                    del session[PRIMARY_READS_SESSION_KEY]
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if token is not None:
+                read_from_primary.reset(token)
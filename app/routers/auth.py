@@ -1,23 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import JSONResponse, Response
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from app.database import get_db
+from app.database import get_db, session_scope
 from app.models import User
 from app.schemas import UserCreate, UserResponse, LoginRequest
-from app.auth import get_password_hash, verify_password, get_current_user_from_session
+from app.auth import (
+    cache_user,
+    get_current_user_from_session,
+    invalidate_user,
+    password_hasher,
+)
+from app.throttle import reset_login_throttle, throttle_login
 
 router = APIRouter()
 
 
+def username_taken() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Username already exists",
+    )
+
+
 @router.get("/user")
 async def get_user(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get current user if authenticated, otherwise return null"""
     try:
-        user = get_current_user_from_session(request, db)
+        user = await get_current_user_from_session(request, db)
         return user
     except HTTPException:
         return JSONResponse(content=None, status_code=200)
@@ -27,19 +42,24 @@ async def get_user(
 async def login(
     login_data: LoginRequest,
     request: Request,
-    db: Session = Depends(get_db),
 ):
     """Login user and set session cookie"""
-    user = db.query(User).filter(User.username == login_data.username).first()
-    if not user or not verify_password(login_data.password, user.password):
+    throttle_login(request, login_data.username)
+
+    # Closed before bcrypt runs, so no connection is held while it does
+    async with session_scope(read_only=True) as db:
+        user = await db.scalar(select(User).where(User.username == login_data.username))
+    if not user or not await password_hasher.verify(login_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
+    reset_login_throttle(login_data.username)
     
     # Set session
     request.session["user_id"] = user.id
-    
+    cache_user(user)
+
     return user
 
 
@@ -47,30 +67,34 @@ async def login(
 async def register(
     user_data: UserCreate,
     request: Request,
-    db: Session = Depends(get_db),
 ):
     """Register a new user"""
+    throttle_login(request, user_data.username)
+
     # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    async with session_scope(read_only=True) as db:
+        existing_user = await db.scalar(select(User).where(User.username == user_data.username))
     if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already exists",
-        )
+        raise username_taken()
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user; the writer connection is only taken for the INSERT, after bcrypt
+    hashed_password = await password_hasher.hash(user_data.password)
     new_user = User(
         username=user_data.username,
         password=hashed_password,
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        async with session_scope() as db:
+            db.add(new_user)
+            await db.commit()
+    except IntegrityError:
+        # Registered by a concurrent request while this one was hashing
+        raise username_taken()
     
     # Set session
     request.session["user_id"] = new_user.id
-    
+    cache_user(new_user)
+
     # Return user with hashed password (as per API spec)
     return new_user
 
@@ -78,6 +102,9 @@ async def register(
 @router.post("/logout")
 async def logout(request: Request):
     """Logout user and clear session cookie"""
+    user_id = request.session.get("user_id")
+    if user_id:
+        invalidate_user(user_id)
     request.session.clear()
     return Response(status_code=status.HTTP_200_OK)
 
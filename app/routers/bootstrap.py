@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Request
+import orjson
+from app.cache import cached_json_response
+from app.replicas import replica_session
+from app.routers.site_settings import settings_not_initialized
+from app.schemas import BootstrapResponse
+from app.snapshots import (
+    product_snapshot,
+    site_settings_store,
+    story_panel_snapshot,
+    team_member_snapshot,
+)
+
+router = APIRouter()
+
+BOOTSTRAP_TAGS = ("site_settings", "products", "team_members", "story_panels")
+
+
+BOOTSTRAP_SOURCES = (site_settings_store, product_snapshot, team_member_snapshot, story_panel_snapshot)
+
+
+async def encode_bootstrap(db=None) -> bytes:
+    settings = await site_settings_store.get(db)
+    if settings is None:
+        raise settings_not_initialized()
+
+    return orjson.dumps(
+        {
+            "siteSettings": dict(settings.values),
+            "products": await product_snapshot.rows(db),
+            "teamMembers": await team_member_snapshot.rows(db),
+            "storyPanels": await story_panel_snapshot.rows(db),
+        }
+    )
+
+
+async def load_bootstrap() -> bytes:
+    """Serialize all public homepage content as one document, from the in-memory snapshots.
+
+    Snapshots that are not loaded yet are all filled through one session.
+    """
+    if all(source.loaded for source in BOOTSTRAP_SOURCES):
+        return await encode_bootstrap()
+    async with replica_session() as db:
+        return await encode_bootstrap(db)
+
+
+@router.get("/bootstrap", response_model=BootstrapResponse)
+async def get_bootstrap(request: Request):
+    """Get site settings, products, team members and story panels in one response"""
+    return await cached_json_response(request, BOOTSTRAP_TAGS, load_bootstrap)
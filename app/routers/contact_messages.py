@@ -1,33 +1,145 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import Response
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from app.database import get_db, get_read_db, session_scope
+from app.ingest import CONTACT_INGEST_MODE, QueueFullError, contact_ingestor
 from app.models import ContactMessage
-from app.schemas import ContactMessageCreate, ContactMessageStatusUpdate, ContactMessageResponse
+from app.pagination import decode_cursor, encode_cursor, keyset_after
+from app.schemas import (
+    ContactMessageCreate,
+    ContactMessageStatusUpdate,
+    ContactMessageResponse,
+    ContactMessagePage,
+    ContactMessageStatus,
+    ContactMessageSummary,
+)
 from app.auth import get_current_user_from_session
+from app.writes import delete_row, update_row_values
 
 router = APIRouter()
 
 
-@router.get("/contact-messages", response_model=List[ContactMessageResponse])
+# Rows fetched per query when streaming the full inbox
+CONTACT_STREAM_BATCH_SIZE = 500
+
+
+async def stream_contact_messages(stmt):
+    """Yield a JSON array of the messages selected by `stmt`, one batch at a time.
+
+    Each batch continues from the last row of the previous one by keyset, so
+    at most CONTACT_STREAM_BATCH_SIZE rows are held in memory at once.
+    """
+    sort_key = (ContactMessage.created_at, ContactMessage.id)
+    after = None
+    first = True
+    yield b"["
+    async with session_scope(read_only=True) as db:
+        while True:
+            batch_stmt = stmt if after is None else stmt.where(keyset_after(sort_key, after, descending=True))
+            messages = (await db.scalars(batch_stmt.limit(CONTACT_STREAM_BATCH_SIZE))).all()
+            if messages:
+                chunk = b",".join(
+                    ContactMessageResponse.model_validate(message).model_dump_json(by_alias=True).encode()
+                    for message in messages
+                )
+                yield chunk if first else b"," + chunk
+                first = False
+            if len(messages) < CONTACT_STREAM_BATCH_SIZE:
+                break
+            after = (messages[-1].created_at, messages[-1].id)
+    yield b"]"
+
+
+@router.get("/contact-messages", response_model=Union[List[ContactMessageResponse], ContactMessagePage])
 async def get_contact_messages(
     request: Request,
-    db: Session = Depends(get_db),
+    status_filter: Optional[ContactMessageStatus] = Query(None, alias="status"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; returns a page object instead of a list"),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get all contact messages (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
-    
-    messages = db.query(ContactMessage).order_by(ContactMessage.created_at.desc()).all()
-    return messages
+    """Get contact messages, newest first, optionally by status and paginated (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    stmt = select(ContactMessage)
+    if status_filter is not None:
+        stmt = stmt.where(ContactMessage.status == status_filter)
+    sort_key = (ContactMessage.created_at, ContactMessage.id)
+    if cursor is not None:
+        if limit is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="cursor requires limit",
+            )
+        created_at, message_id = decode_cursor(cursor, len(sort_key))
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+        stmt = stmt.where(keyset_after(sort_key, (created_at, message_id), descending=True))
+    stmt = stmt.order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc())
+    if limit is None:
+        # The full inbox is streamed in batches instead of being built in memory
+        return StreamingResponse(stream_contact_messages(stmt), media_type="application/json")
+
+    # One extra row tells us whether there is a next page
+    messages = (await db.scalars(stmt.limit(limit + 1))).all()
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = encode_cursor((messages[-1].created_at.isoformat(), messages[-1].id))
+    return ContactMessagePage(
+        items=[ContactMessageResponse.model_validate(message) for message in messages],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/contact-messages/summary", response_model=ContactMessageSummary)
+async def get_contact_message_summary(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Count contact messages by status (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    result = await db.execute(
+        select(ContactMessage.status, func.count()).group_by(ContactMessage.status)
+    )
+    counts = {message_status: count for message_status, count in result.all()}
+    return ContactMessageSummary(
+        **{key: value for key, value in counts.items() if key in ContactMessageSummary.model_fields},
+        total=sum(counts.values()),
+    )
 
 
 @router.post("/contact")
 async def create_contact_message(
     message_data: ContactMessageCreate,
-    db: Session = Depends(get_db),
 ):
     """Create a new contact message"""
+    if CONTACT_INGEST_MODE == "queue":
+        # Acknowledge now; the background writer batch-inserts from the spool
+        try:
+            await contact_ingestor.submit(
+                name=message_data.name,
+                email=message_data.email,
+                company=message_data.company,
+                message=message_data.message,
+            )
+        except QueueFullError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many messages, try again shortly",
+                headers={"Retry-After": "5"},
+            )
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+
     new_message = ContactMessage(
         name=message_data.name,
         email=message_data.email,
@@ -35,9 +147,10 @@ async def create_contact_message(
         message=message_data.message,
         status="new",
     )
-    db.add(new_message)
-    db.commit()
-    db.refresh(new_message)
+    # Only the direct path needs a connection; queue mode answers without one
+    async with session_scope() as db:
+        db.add(new_message)
+        await db.commit()
     return Response(status_code=status.HTTP_200_OK)
 
 
@@ -46,20 +159,13 @@ async def update_contact_message_status(
     message_id: str,
     status_data: ContactMessageStatusUpdate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update contact message status (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
+    await get_current_user_from_session(request, db)  # Check authentication
     
-    message = db.query(ContactMessage).filter(ContactMessage.id == message_id).first()
-    if not message:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Contact message not found",
-        )
-    
-    message.status = status_data.status
-    db.commit()
+    await update_row_values(db, ContactMessage, message_id, {"status": status_data.status}, "Contact message not found")
+    await db.commit()
     return Response(status_code=status.HTTP_200_OK)
 
 
@@ -67,19 +173,12 @@ async def update_contact_message_status(
 async def delete_contact_message(
     message_id: str,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a contact message (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
-    
-    message = db.query(ContactMessage).filter(ContactMessage.id == message_id).first()
-    if not message:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Contact message not found",
-        )
+    await get_current_user_from_session(request, db)  # Check authentication
     
-    db.delete(message)
-    db.commit()
+    await delete_row(db, ContactMessage, message_id, "Contact message not found")
+    await db.commit()
     return Response(status_code=status.HTTP_200_OK)
 
@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status, Request
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+import os
+from app.database import get_db
+from app.images import (
+    DERIVATIVE_FORMATS,
+    DERIVATIVE_MEDIA_TYPES,
+    DERIVATIVE_NAME_RE,
+    IMAGE_FORMATS,
+    IMAGE_MAX_UPLOAD_BYTES,
+    IMAGE_URL_RE,
+    ORIGINAL_MEDIA_TYPES,
+    ImageError,
+    ImageKey,
+    derivative_widths,
+    image_pipeline,
+    original_path,
+)
+from app.schemas import ImageUploadResponse
+from app.auth import get_current_user_from_session
+
+router = APIRouter()
+
+# Image URLs are content-addressed, so what they name never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Derivative file extension -> format name
+DERIVATIVE_EXTENSIONS = {extension: image_format for image_format, (extension, _) in DERIVATIVE_FORMATS.items()}
+
+
+def image_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Image not found",
+    )
+
+
+@router.post("/images", response_model=ImageUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_image(
+    request: Request,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """Upload a JPEG, PNG or WebP image; returns its URL and srcset (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    data = await file.read(IMAGE_MAX_UPLOAD_BYTES + 1)
+    if len(data) > IMAGE_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image larger than {IMAGE_MAX_UPLOAD_BYTES} bytes",
+        )
+    try:
+        url = await image_pipeline.store(data)
+    except ImageError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    key = ImageKey.parse(IMAGE_URL_RE.search(url).group(1))
+    return ImageUploadResponse(image=url, width=key.width, height=key.height)
+
+
+@router.get("/images/{filename}")
+async def get_image(filename: str):
+    """Serve an uploaded original"""
+    name, _, extension = filename.rpartition(".")
+    key = ImageKey.parse(name)
+    if key is None or extension not in ORIGINAL_MEDIA_TYPES:
+        raise image_not_found()
+    path = original_path(key, extension)
+    if not os.path.exists(path):
+        raise image_not_found()
+    return FileResponse(
+        path,
+        media_type=ORIGINAL_MEDIA_TYPES[extension],
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+@router.get("/images/{name}/{variant}")
+async def get_image_derivative(name: str, variant: str):
+    """Serve a resized derivative listed in a srcset, building it if it is not cached"""
+    key = ImageKey.parse(name)
+    match = DERIVATIVE_NAME_RE.match(variant)
+    if key is None or match is None:
+        raise image_not_found()
+    width, image_format = int(match.group(1)), DERIVATIVE_EXTENSIONS[match.group(2)]
+    # Only the sizes a srcset can list, so requests cannot fill the cache with arbitrary widths
+    if image_format not in IMAGE_FORMATS or width not in derivative_widths(key.width):
+        raise image_not_found()
+    path = await image_pipeline.derivative(key, width, image_format)
+    if path is None:
+        raise image_not_found()
+    return FileResponse(
+        path,
+        media_type=DERIVATIVE_MEDIA_TYPES[match.group(2)],
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
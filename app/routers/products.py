@@ -1,35 +1,240 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status, Request
 from fastapi.responses import Response
-from sqlalchemy.orm import Session
-from typing import List
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from app.bulk import bulk_create, bulk_update, reorder
+from app.cache import cached_json_response, mark_changed
 from app.database import get_db
+from app.invalidation import publish_change
+from app.images import add_srcsets
 from app.models import Product
-from app.schemas import ProductCreate, ProductUpdate, ProductResponse
+from app.replicas import replica_session
+from app.writes import delete_row, update_row
+from app.search import product_search_query, search_terms
+from app.snapshots import product_snapshot
+from app.pagination import decode_cursor, encode_cursor, keyset_after
+from app.schemas import (
+    BULK_MAX_ITEMS,
+    ReorderRequest,
+    ProductBulkUpdate,
+    ProductCreate,
+    ProductUpdate,
+    ProductResponse,
+    ProductPage,
+)
 from app.auth import get_current_user_from_session
 
 router = APIRouter()
 
+# Response field name (camelCase alias or snake_case) -> Product column attribute
+PRODUCT_FIELDS = {}
+for name, field in ProductResponse.model_fields.items():
+    PRODUCT_FIELDS[name] = name
+    PRODUCT_FIELDS[field.alias or name] = name
+# Always returned: identify the row and carry the pagination sort key
+PRODUCT_REQUIRED_FIELDS = ("id", "display_order")
 
-@router.get("/products", response_model=List[ProductResponse])
-async def get_products(db: Session = Depends(get_db)):
-    """Get all products"""
-    products = db.query(Product).order_by(Product.display_order).all()
+
+def parse_product_fields(fields: Optional[str]) -> List[str]:
+    """Resolve a fields= projection into Product attributes, in response order"""
+    if not fields:
+        return list(ProductResponse.model_fields)
+    requested = set(PRODUCT_REQUIRED_FIELDS)
+    for name in fields.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in PRODUCT_FIELDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown product field: {name}",
+            )
+        requested.add(PRODUCT_FIELDS[name])
+    return [name for name in ProductResponse.model_fields if name in requested]
+
+
+async def load_products(
+    field_names: List[str],
+    category: Optional[str] = None,
+    species: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[list] = None,
+) -> bytes:
+    """Query and serialize a products list (or page) for the response cache"""
+    unfiltered = category is None and species is None and limit is None
+    if unfiltered and len(field_names) == len(ProductResponse.model_fields):
+        # The plain full list is kept pre-serialized in memory
+        return await product_snapshot.body()
+
+    # Only the projected columns are selected, so listings can skip `story`
+    stmt = select(*(getattr(Product, name) for name in field_names))
+    if category is not None:
+        stmt = stmt.where(Product.category == category)
+    if species is not None:
+        stmt = stmt.where(Product.species == species)
+    sort_key = (Product.display_order, Product.id)
+    if after is not None:
+        stmt = stmt.where(keyset_after(sort_key, after))
+    stmt = stmt.order_by(*sort_key)
+    if limit is not None:
+        # One extra row tells us whether there is a next page
+        stmt = stmt.limit(limit + 1)
+
+    async with replica_session() as db:
+        rows = (await db.execute(stmt)).all()
+
+    aliases = [ProductResponse.model_fields[name].alias or name for name in field_names]
+    items = [add_srcsets(dict(zip(aliases, row))) for row in rows]
+    if limit is None:
+        return to_json(items)
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = rows[limit - 1]
+        next_cursor = encode_cursor((last.display_order, last.id))
+    return to_json({"items": items, "nextCursor": next_cursor})
+
+
+@router.get("/products", response_model=Union[List[ProductResponse], ProductPage])
+async def get_products(
+    request: Request,
+    category: Optional[str] = None,
+    species: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,image"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; returns a page object instead of a list"),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+):
+    """Get products, optionally filtered, projected and paginated by (displayOrder, id)"""
+    field_names = parse_product_fields(fields)
+    after = None
+    if cursor is not None:
+        if limit is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="cursor requires limit",
+            )
+        after = decode_cursor(cursor, 2)
+    return await cached_json_response(
+        request,
+        "products",
+        lambda: load_products(field_names, category, species, limit, after),
+    )
+
+
+async def load_product_search(field_names: List[str], terms: List[str], limit: int, after: Optional[list]) -> bytes:
+    """Query and serialize one page of ranked search results for the response cache"""
+    columns = [getattr(Product, name) for name in field_names]
+    async with replica_session() as db:
+        rows = (await db.execute(product_search_query(terms, columns, limit, after))).all()
+
+    aliases = [ProductResponse.model_fields[name].alias or name for name in field_names]
+    items = [add_srcsets(dict(zip(aliases, row))) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor((last.rank, last.id))
+    return to_json({"items": items, "nextCursor": next_cursor})
+
+
+@router.get("/products/search", response_model=ProductPage)
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in name, species, origin or story"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,image"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+):
+    """Full-text product search, best matches first, paginated by (rank, id)"""
+    field_names = parse_product_fields(fields)
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query has no words",
+        )
+    after = decode_cursor(cursor, 2) if cursor is not None else None
+    return await cached_json_response(
+        request,
+        "products",
+        lambda: load_product_search(field_names, terms, limit, after),
+    )
+
+
+@router.post("/products/bulk", response_model=List[ProductResponse], status_code=status.HTTP_201_CREATED)
+async def bulk_create_products(
+    request: Request,
+    products_data: List[ProductCreate] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create many products in one transaction (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    rows = await bulk_create(db, Product, [data.model_dump(by_alias=False) for data in products_data])
+    await publish_change(db, "products")
+    await db.commit()
+    created = [ProductResponse.model_validate(row) for row in rows]
+    product_snapshot.upsert_many(created)
+    mark_changed("products")
+    return created
+
+
+@router.patch("/products/bulk", response_model=List[ProductResponse])
+async def bulk_update_products(
+    request: Request,
+    products_data: List[ProductBulkUpdate] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Partially update many products, matched by id, in one transaction (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    products = await bulk_update(
+        db,
+        Product,
+        [data.model_dump(exclude_unset=True, by_alias=False) for data in products_data],
+        "Product not found",
+    )
+    await publish_change(db, "products")
+    await db.commit()
+    product_snapshot.upsert_many(products)
+    mark_changed("products")
     return products
 
 
+@router.post("/products/reorder")
+async def reorder_products(
+    reorder_data: ReorderRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """Set displayOrder of the given products to their position in the list (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    await reorder(db, Product, reorder_data.ids, "Product not found")
+    await publish_change(db, "products")
+    await db.commit()
+    product_snapshot.reorder(reorder_data.ids)
+    mark_changed("products")
+    return Response(status_code=status.HTTP_200_OK)
+
+
 @router.post("/products", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a new product (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
+    await get_current_user_from_session(request, db)  # Check authentication
     
     new_product = Product(**product_data.model_dump(by_alias=False))
     db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
+    await publish_change(db, "products")
+    await db.commit()
+    product_snapshot.upsert(new_product)
+    mark_changed("products")
     return new_product
 
 
@@ -38,25 +243,18 @@ async def update_product(
     product_id: str,
     product_data: ProductUpdate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a product (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
-    
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found",
-        )
+    await get_current_user_from_session(request, db)  # Check authentication
     
     # Update only provided fields
     update_data = product_data.model_dump(exclude_unset=True, by_alias=False)
-    for field, value in update_data.items():
-        setattr(product, field, value)
-    
-    db.commit()
-    db.refresh(product)
+    product = await update_row(db, Product, product_id, update_data, "Product not found")
+    await publish_change(db, "products")
+    await db.commit()
+    product_snapshot.upsert(product)
+    mark_changed("products")
     return product
 
 
@@ -64,19 +262,15 @@ async def update_product(
 async def delete_product(
     product_id: str,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a product (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
-    
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found",
-        )
+    await get_current_user_from_session(request, db)  # Check authentication
     
-    db.delete(product)
-    db.commit()
+    await delete_row(db, Product, product_id, "Product not found")
+    await publish_change(db, "products")
+    await db.commit()
+    product_snapshot.delete(product_id)
+    mark_changed("products")
     return Response(status_code=status.HTTP_200_OK)
 
@@ -1,67 +1,71 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import cached_json_response, mark_changed
 from app.database import get_db
+from app.invalidation import publish_change
 from app.models import SiteSettings
 from app.schemas import SiteSettingsUpdate, SiteSettingsResponse
+from app.snapshots import site_settings_store
+from app.writes import update_row
 from app.auth import get_current_user_from_session
 
 router = APIRouter()
 
 
+def settings_not_initialized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Site settings have not been initialized; run `python -m app.migrations upgrade`",
+    )
+
+
+async def load_site_settings() -> bytes:
+    """Serialized site settings for the response cache, from memory"""
+    current = await site_settings_store.get()
+    if current is None:
+        raise settings_not_initialized()
+    return current.body
+
+
 @router.get("/site-settings", response_model=SiteSettingsResponse)
-async def get_site_settings(db: Session = Depends(get_db)):
+async def get_site_settings(request: Request):
     """Get site settings"""
-    settings = db.query(SiteSettings).first()
-    if not settings:
-        # Create default settings if none exist
-        default_settings = SiteSettings(
-            hero_title="Welcome to Morris Timber Co",
-            hero_subtitle="Premium Timber Products",
-            hero_image="",
-            mission_title="Our Mission",
-            mission_description="Delivering quality timber products",
-            contact_phone="",
-            contact_email=None,
-        )
-        db.add(default_settings)
-        db.commit()
-        db.refresh(default_settings)
-        return default_settings
-    return settings
+    return await cached_json_response(request, "site_settings", load_site_settings)
 
 
 @router.patch("/site-settings", response_model=SiteSettingsResponse)
 async def update_site_settings(
     settings_data: SiteSettingsUpdate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update site settings (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
-    
-    settings = db.query(SiteSettings).first()
-    if not settings:
-        # Create new settings if none exist
-        settings = SiteSettings(
-            hero_title="",
-            hero_subtitle="",
-            hero_image="",
-            mission_title="",
-            mission_description="",
-            contact_phone="",
-            contact_email=None,
-        )
-        db.add(settings)
-        db.commit()
-        db.refresh(settings)
+    await get_current_user_from_session(request, db)  # Check authentication
     
     # Update only provided fields
     # by_alias=False gives us snake_case field names for database
     update_data = settings_data.model_dump(exclude_unset=True, by_alias=False)
-    for field, value in update_data.items():
-        setattr(settings, field, value)
-    
-    db.commit()
-    db.refresh(settings)
+    async with site_settings_store.write_lock:
+        current = await site_settings_store.get()
+        if current is None:
+            # Create the row if it was never seeded
+            settings = SiteSettings(
+                **{
+                    "hero_title": "",
+                    "hero_subtitle": "",
+                    "hero_image": "",
+                    "mission_title": "",
+                    "mission_description": "",
+                    "contact_phone": "",
+                    "contact_email": None,
+                    **update_data,
+                }
+            )
+            db.add(settings)
+        else:
+            settings = await update_row(db, SiteSettings, current.id, update_data, "Site settings not found")
+        await publish_change(db, "site_settings")
+        await db.commit()
+        site_settings_store.set(settings)
+    mark_changed("site_settings")
     return settings
-
@@ -1,35 +1,110 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Body, Depends, status, Request
 from fastapi.responses import Response
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from app.bulk import bulk_create, bulk_update, reorder
+from app.cache import cached_json_response, mark_changed
 from app.database import get_db
+from app.invalidation import publish_change
 from app.models import StoryPanel
-from app.schemas import StoryPanelCreate, StoryPanelUpdate, StoryPanelResponse
+from app.writes import delete_row, update_row
+from app.snapshots import story_panel_snapshot
+from app.schemas import (
+    BULK_MAX_ITEMS,
+    ReorderRequest,
+    StoryPanelBulkUpdate,
+    StoryPanelCreate,
+    StoryPanelUpdate,
+    StoryPanelResponse,
+)
 from app.auth import get_current_user_from_session
 
 router = APIRouter()
 
 
+async def load_story_panels() -> bytes:
+    """Serialized story panels list for the response cache, from the in-memory snapshot"""
+    return await story_panel_snapshot.body()
+
+
 @router.get("/story-panels", response_model=List[StoryPanelResponse])
-async def get_story_panels(db: Session = Depends(get_db)):
+async def get_story_panels(request: Request):
     """Get all story panels"""
-    story_panels = db.query(StoryPanel).order_by(StoryPanel.display_order).all()
+    return await cached_json_response(request, "story_panels", load_story_panels)
+
+
+@router.post("/story-panels/bulk", response_model=List[StoryPanelResponse], status_code=status.HTTP_201_CREATED)
+async def bulk_create_story_panels(
+    request: Request,
+    story_panels_data: List[StoryPanelCreate] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create many story panels in one transaction (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    rows = await bulk_create(db, StoryPanel, [data.model_dump(by_alias=False) for data in story_panels_data])
+    await publish_change(db, "story_panels")
+    await db.commit()
+    created = [StoryPanelResponse.model_validate(row) for row in rows]
+    story_panel_snapshot.upsert_many(created)
+    mark_changed("story_panels")
+    return created
+
+
+@router.patch("/story-panels/bulk", response_model=List[StoryPanelResponse])
+async def bulk_update_story_panels(
+    request: Request,
+    story_panels_data: List[StoryPanelBulkUpdate] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Partially update many story panels, matched by id, in one transaction (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    story_panels = await bulk_update(
+        db,
+        StoryPanel,
+        [data.model_dump(exclude_unset=True, by_alias=False) for data in story_panels_data],
+        "Story panel not found",
+    )
+    await publish_change(db, "story_panels")
+    await db.commit()
+    story_panel_snapshot.upsert_many(story_panels)
+    mark_changed("story_panels")
     return story_panels
 
 
+@router.post("/story-panels/reorder")
+async def reorder_story_panels(
+    reorder_data: ReorderRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """Set displayOrder of the given story panels to their position in the list (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    await reorder(db, StoryPanel, reorder_data.ids, "Story panel not found")
+    await publish_change(db, "story_panels")
+    await db.commit()
+    story_panel_snapshot.reorder(reorder_data.ids)
+    mark_changed("story_panels")
+    return Response(status_code=status.HTTP_200_OK)
+
+
 @router.post("/story-panels", response_model=StoryPanelResponse, status_code=status.HTTP_201_CREATED)
 async def create_story_panel(
     story_panel_data: StoryPanelCreate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a new story panel (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
+    await get_current_user_from_session(request, db)  # Check authentication
     
     new_story_panel = StoryPanel(**story_panel_data.model_dump(by_alias=False))
     db.add(new_story_panel)
-    db.commit()
-    db.refresh(new_story_panel)
+    await publish_change(db, "story_panels")
+    await db.commit()
+    story_panel_snapshot.upsert(new_story_panel)
+    mark_changed("story_panels")
     return new_story_panel
 
 
@@ -38,25 +113,18 @@ async def update_story_panel(
     story_panel_id: str,
     story_panel_data: StoryPanelUpdate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a story panel (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
-    
-    story_panel = db.query(StoryPanel).filter(StoryPanel.id == story_panel_id).first()
-    if not story_panel:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Story panel not found",
-        )
+    await get_current_user_from_session(request, db)  # Check authentication
     
     # Update only provided fields
     update_data = story_panel_data.model_dump(exclude_unset=True, by_alias=False)
-    for field, value in update_data.items():
-        setattr(story_panel, field, value)
-    
-    db.commit()
-    db.refresh(story_panel)
+    story_panel = await update_row(db, StoryPanel, story_panel_id, update_data, "Story panel not found")
+    await publish_change(db, "story_panels")
+    await db.commit()
+    story_panel_snapshot.upsert(story_panel)
+    mark_changed("story_panels")
     return story_panel
 
 
@@ -64,19 +132,15 @@ async def update_story_panel(
 async def delete_story_panel(
     story_panel_id: str,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a story panel (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
-    
-    story_panel = db.query(StoryPanel).filter(StoryPanel.id == story_panel_id).first()
-    if not story_panel:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Story panel not found",
-        )
+    await get_current_user_from_session(request, db)  # Check authentication
     
-    db.delete(story_panel)
-    db.commit()
+    await delete_row(db, StoryPanel, story_panel_id, "Story panel not found")
+    await publish_change(db, "story_panels")
+    await db.commit()
+    story_panel_snapshot.delete(story_panel_id)
+    mark_changed("story_panels")
     return Response(status_code=status.HTTP_200_OK)
 
@@ -1,35 +1,110 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Body, Depends, status, Request
 from fastapi.responses import Response
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from app.bulk import bulk_create, bulk_update, reorder
+from app.cache import cached_json_response, mark_changed
 from app.database import get_db
+from app.invalidation import publish_change
 from app.models import TeamMember
-from app.schemas import TeamMemberCreate, TeamMemberUpdate, TeamMemberResponse
+from app.writes import delete_row, update_row
+from app.snapshots import team_member_snapshot
+from app.schemas import (
+    BULK_MAX_ITEMS,
+    ReorderRequest,
+    TeamMemberBulkUpdate,
+    TeamMemberCreate,
+    TeamMemberUpdate,
+    TeamMemberResponse,
+)
 from app.auth import get_current_user_from_session
 
 router = APIRouter()
 
 
+async def load_team_members() -> bytes:
+    """Serialized team members list for the response cache, from the in-memory snapshot"""
+    return await team_member_snapshot.body()
+
+
 @router.get("/team-members", response_model=List[TeamMemberResponse])
-async def get_team_members(db: Session = Depends(get_db)):
+async def get_team_members(request: Request):
     """Get all team members"""
-    team_members = db.query(TeamMember).order_by(TeamMember.display_order).all()
+    return await cached_json_response(request, "team_members", load_team_members)
+
+
+@router.post("/team-members/bulk", response_model=List[TeamMemberResponse], status_code=status.HTTP_201_CREATED)
+async def bulk_create_team_members(
+    request: Request,
+    team_members_data: List[TeamMemberCreate] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create many team members in one transaction (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    rows = await bulk_create(db, TeamMember, [data.model_dump(by_alias=False) for data in team_members_data])
+    await publish_change(db, "team_members")
+    await db.commit()
+    created = [TeamMemberResponse.model_validate(row) for row in rows]
+    team_member_snapshot.upsert_many(created)
+    mark_changed("team_members")
+    return created
+
+
+@router.patch("/team-members/bulk", response_model=List[TeamMemberResponse])
+async def bulk_update_team_members(
+    request: Request,
+    team_members_data: List[TeamMemberBulkUpdate] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Partially update many team members, matched by id, in one transaction (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    team_members = await bulk_update(
+        db,
+        TeamMember,
+        [data.model_dump(exclude_unset=True, by_alias=False) for data in team_members_data],
+        "Team member not found",
+    )
+    await publish_change(db, "team_members")
+    await db.commit()
+    team_member_snapshot.upsert_many(team_members)
+    mark_changed("team_members")
     return team_members
 
 
+@router.post("/team-members/reorder")
+async def reorder_team_members(
+    reorder_data: ReorderRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """Set displayOrder of the given team members to their position in the list (auth required)"""
+    await get_current_user_from_session(request, db)  # Check authentication
+
+    await reorder(db, TeamMember, reorder_data.ids, "Team member not found")
+    await publish_change(db, "team_members")
+    await db.commit()
+    team_member_snapshot.reorder(reorder_data.ids)
+    mark_changed("team_members")
+    return Response(status_code=status.HTTP_200_OK)
+
+
 @router.post("/team-members", response_model=TeamMemberResponse, status_code=status.HTTP_201_CREATED)
 async def create_team_member(
     team_member_data: TeamMemberCreate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a new team member (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
+    await get_current_user_from_session(request, db)  # Check authentication
     
     new_team_member = TeamMember(**team_member_data.model_dump(by_alias=False))
     db.add(new_team_member)
-    db.commit()
-    db.refresh(new_team_member)
+    await publish_change(db, "team_members")
+    await db.commit()
+    team_member_snapshot.upsert(new_team_member)
+    mark_changed("team_members")
     return new_team_member
 
 
@@ -38,25 +113,18 @@ async def update_team_member(
     team_member_id: str,
     team_member_data: TeamMemberUpdate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a team member (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
-    
-    team_member = db.query(TeamMember).filter(TeamMember.id == team_member_id).first()
-    if not team_member:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Team member not found",
-        )
+    await get_current_user_from_session(request, db)  # Check authentication
     
     # Update only provided fields
     update_data = team_member_data.model_dump(exclude_unset=True, by_alias=False)
-    for field, value in update_data.items():
-        setattr(team_member, field, value)
-    
-    db.commit()
-    db.refresh(team_member)
+    team_member = await update_row(db, TeamMember, team_member_id, update_data, "Team member not found")
+    await publish_change(db, "team_members")
+    await db.commit()
+    team_member_snapshot.upsert(team_member)
+    mark_changed("team_members")
     return team_member
 
 
@@ -64,19 +132,15 @@ async def update_team_member(
 async def delete_team_member(
     team_member_id: str,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a team member (auth required)"""
-    get_current_user_from_session(request, db)  # Check authentication
-    
-    team_member = db.query(TeamMember).filter(TeamMember.id == team_member_id).first()
-    if not team_member:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Team member not found",
-        )
+    await get_current_user_from_session(request, db)  # Check authentication
     
-    db.delete(team_member)
-    db.commit()
+    await delete_row(db, TeamMember, team_member_id, "Team member not found")
+    await publish_change(db, "team_members")
+    await db.commit()
+    team_member_snapshot.delete(team_member_id)
+    mark_changed("team_members")
     return Response(status_code=status.HTTP_200_OK)
 
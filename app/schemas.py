@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, computed_field
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
+from app.images import image_srcset
 
 
 # User Schemas
@@ -20,6 +21,14 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+# Bulk Schemas
+BULK_MAX_ITEMS = 500
+
+
+class ReorderRequest(BaseModel):
+    ids: List[str] = Field(max_length=BULK_MAX_ITEMS)
+
+
 # Product Schemas
 class ProductBase(BaseModel):
     name: str
@@ -53,6 +62,10 @@ class ProductUpdate(BaseModel):
         populate_by_name = True
 
 
+class ProductBulkUpdate(ProductUpdate):
+    id: str
+
+
 class ProductResponse(ProductBase):
     id: str
 
@@ -60,6 +73,20 @@ class ProductResponse(ProductBase):
         from_attributes = True
         populate_by_name = True  # Allow both snake_case and camelCase
 
+    @computed_field(alias="imageSrcset")
+    @property
+    def image_srcset(self) -> Optional[Dict[str, str]]:
+        """Resized WebP/JPEG variants per format, for uploaded images"""
+        return image_srcset(self.image)
+
+
+class ProductPage(BaseModel):
+    items: List[ProductResponse]
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
+
+    class Config:
+        populate_by_name = True
+
 
 # Team Member Schemas
 class TeamMemberBase(BaseModel):
@@ -88,6 +115,10 @@ class TeamMemberUpdate(BaseModel):
         populate_by_name = True
 
 
+class TeamMemberBulkUpdate(TeamMemberUpdate):
+    id: str
+
+
 class TeamMemberResponse(TeamMemberBase):
     id: str
 
@@ -95,6 +126,11 @@ class TeamMemberResponse(TeamMemberBase):
         from_attributes = True
         populate_by_name = True
 
+    @computed_field(alias="imageSrcset")
+    @property
+    def image_srcset(self) -> Optional[Dict[str, str]]:
+        return image_srcset(self.image)
+
 
 # Story Panel Schemas
 class StoryPanelBase(BaseModel):
@@ -121,6 +157,10 @@ class StoryPanelUpdate(BaseModel):
         populate_by_name = True
 
 
+class StoryPanelBulkUpdate(StoryPanelUpdate):
+    id: str
+
+
 class StoryPanelResponse(StoryPanelBase):
     id: str
 
@@ -128,6 +168,11 @@ class StoryPanelResponse(StoryPanelBase):
         from_attributes = True
         populate_by_name = True
 
+    @computed_field(alias="imageSrcset")
+    @property
+    def image_srcset(self) -> Optional[Dict[str, str]]:
+        return image_srcset(self.image)
+
 
 # Site Settings Schemas
 class SiteSettingsBase(BaseModel):
@@ -163,8 +208,40 @@ class SiteSettingsResponse(SiteSettingsBase):
         from_attributes = True
         populate_by_name = True
 
+    @computed_field(alias="heroImageSrcset")
+    @property
+    def hero_image_srcset(self) -> Optional[Dict[str, str]]:
+        return image_srcset(self.hero_image)
+
+
+# Image Schemas
+class ImageUploadResponse(BaseModel):
+    image: str
+    width: int
+    height: int
+
+    @computed_field(alias="imageSrcset")
+    @property
+    def image_srcset(self) -> Optional[Dict[str, str]]:
+        return image_srcset(self.image)
+
+
+# Homepage Bootstrap Schema
+class BootstrapResponse(BaseModel):
+    site_settings: SiteSettingsResponse = Field(alias="siteSettings")
+    products: List[ProductResponse]
+    team_members: List[TeamMemberResponse] = Field(alias="teamMembers")
+    story_panels: List[StoryPanelResponse] = Field(alias="storyPanels")
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
 
 # Contact Message Schemas
+ContactMessageStatus = Literal["new", "read", "replied", "archived"]
+
+
 class ContactMessageBase(BaseModel):
     name: str
     email: str
@@ -190,6 +267,22 @@ class ContactMessageResponse(ContactMessageBase):
         populate_by_name = True
 
 
+class ContactMessagePage(BaseModel):
+    items: List[ContactMessageResponse]
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
+
+    class Config:
+        populate_by_name = True
+
+
+class ContactMessageSummary(BaseModel):
+    new: int = 0
+    read: int = 0
+    replied: int = 0
+    archived: int = 0
+    total: int = 0
+
+
 # Login Schema
 class LoginRequest(BaseModel):
     username: str
@@ -0,0 +1,55 @@
+from sqlalchemy import column, func, literal_column, select, table, text
+from app.database import IS_SQLITE
+from app.models import Product
+from app.pagination import keyset_after
+import re
+
+# Columns searched, with their relevance weight (higher = more important)
+SEARCH_COLUMNS = (("name", 10.0, "A"), ("species", 5.0, "B"), ("origin", 5.0, "B"), ("story", 1.0, "D"))
+
+# SQLite: the products_fts FTS5 table and its triggers come from migration 0003
+_fts_table = table("products_fts", column("rowid"))
+
+# Postgres: the GIN index from migration 0003 covers this weighted tsvector
+# expression. The text search config and weights are inlined (not bound) so
+# queries match the indexed expression exactly and the planner can use it.
+_regconfig = text("'english'::regconfig")
+product_search_document = None
+for _name, _, _weight in SEARCH_COLUMNS:
+    _part = func.setweight(func.to_tsvector(_regconfig, getattr(Product, _name)), text(f"'{_weight}'"))
+    product_search_document = _part if product_search_document is None else product_search_document.op("||")(_part)
+
+
+def search_terms(q: str) -> list:
+    """Words of a free-text query; punctuation and operators are dropped"""
+    return re.findall(r"\w+", q.lower())
+
+
+def product_search_query(terms: list, columns: list, limit: int, after=None):
+    """Ranked SELECT of Product `columns` plus a `rank` column (lower is better).
+
+    Every term must match, each as a prefix. Results are ordered by
+    (rank, id) so pages can continue with a keyset cursor.
+    """
+    if IS_SQLITE:
+        match = " ".join(f'"{term}"*' for term in terms)
+        fts = literal_column("products_fts")
+        weights = [weight for _, weight, _ in SEARCH_COLUMNS]
+        # bm25() is already "lower is better"
+        rank = func.bm25(fts, *weights).label("rank")
+        ranked = (
+            select(*columns, rank)
+            .select_from(Product.__table__)
+            .join(_fts_table, _fts_table.c.rowid == literal_column("products.rowid"))
+            .where(fts.op("MATCH")(match))
+        )
+    else:
+        query = func.to_tsquery(_regconfig, " & ".join(f"{term}:*" for term in terms))
+        rank = (-func.ts_rank(product_search_document, query)).label("rank")
+        ranked = select(*columns, rank).where(product_search_document.op("@@")(query))
+
+    ranked = ranked.subquery()
+    stmt = select(ranked)
+    if after is not None:
+        stmt = stmt.where(keyset_after((ranked.c.rank, ranked.c.id), after))
+    return stmt.order_by(ranked.c.rank, ranked.c.id).limit(limit + 1)
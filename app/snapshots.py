@@ -0,0 +1,184 @@
+from contextlib import nullcontext
+from dataclasses import dataclass
+from sqlalchemy import select
+from types import MappingProxyType
+from typing import Mapping, Optional
+import asyncio
+import orjson
+from app.images import add_srcsets
+from app.models import Product, SiteSettings, StoryPanel, TeamMember
+from app.replicas import replica_session
+from app.schemas import ProductResponse, SiteSettingsResponse, StoryPanelResponse, TeamMemberResponse
+
+
+def session_or_own(db):
+    """Use the caller's session, or open a read session for this load alone"""
+    return nullcontext(db) if db is not None else replica_session()
+
+
+class TableSnapshot:
+    """Public rows of one table, held as JSON-ready dicts plus their encoded bytes.
+
+    Built from the database on first use, then patched in place by the write
+    handlers (upsert/delete) so a commit re-encodes the list with orjson
+    instead of re-querying the table. Row dicts use the response schema's
+    aliases and field order (srcsets last, like its computed fields), so the
+    bytes match what response_model produced.
+    """
+
+    def __init__(self, model, schema, order_by):
+        self.model = model
+        self.order_by = order_by
+        # (attribute, JSON key) in response field order
+        self.fields = [(name, field.alias or name) for name, field in schema.model_fields.items()]
+        self._rows = None
+        self._body = None
+        # Bumped by every change, so a load racing a write is thrown away
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def _row(self, instance) -> dict:
+        return add_srcsets({key: getattr(instance, name) for name, key in self.fields})
+
+    def _sort_key(self, row: dict):
+        # NULLs first, as SQLite orders them
+        return tuple((row[key] is not None, row[key]) for key in self.order_by)
+
+    def _encode(self):
+        self._body = orjson.dumps(sorted(self._rows.values(), key=self._sort_key))
+
+    @property
+    def loaded(self) -> bool:
+        return self._rows is not None
+
+    async def _ensure_loaded(self, db=None):
+        if self._rows is not None:
+            return
+        async with self._lock:
+            while self._rows is None:
+                generation = self._generation
+                columns = [getattr(self.model, name) for name, _ in self.fields]
+                async with session_or_own(db) as session:
+                    result = await session.execute(select(*columns))
+                    rows = [add_srcsets(dict(zip((key for _, key in self.fields), row))) for row in result.all()]
+                if generation == self._generation:
+                    self._rows = {row["id"]: row for row in rows}
+                    self._encode()
+
+    async def rows(self, db=None) -> list:
+        """Rows as dicts in display order; a load goes through `db` when given"""
+        await self._ensure_loaded(db)
+        return sorted(self._rows.values(), key=self._sort_key)
+
+    async def body(self) -> bytes:
+        """Encoded JSON list"""
+        await self._ensure_loaded()
+        return self._body
+
+    def upsert(self, instance):
+        """Apply a committed insert or update"""
+        self.upsert_many([instance])
+
+    def upsert_many(self, instances):
+        """Apply a batch of committed inserts or updates with a single re-encode"""
+        self._generation += 1
+        if self._rows is not None:
+            for instance in instances:
+                row = self._row(instance)
+                self._rows[row["id"]] = row
+            self._encode()
+
+    def reorder(self, row_ids: list):
+        """Apply a committed reorder: each row's display order becomes its position"""
+        self._generation += 1
+        if self._rows is not None:
+            for position, row_id in enumerate(row_ids):
+                if row_id in self._rows:
+                    self._rows[row_id]["displayOrder"] = position
+            self._encode()
+
+    def delete(self, row_id: str):
+        """Apply a committed delete"""
+        self._generation += 1
+        if self._rows is not None and self._rows.pop(row_id, None) is not None:
+            self._encode()
+
+    def invalidate(self):
+        """Forget everything; the next read rebuilds from the database"""
+        self._generation += 1
+        self._rows = None
+        self._body = None
+
+
+product_snapshot = TableSnapshot(Product, ProductResponse, order_by=("displayOrder", "id"))
+team_member_snapshot = TableSnapshot(TeamMember, TeamMemberResponse, order_by=("displayOrder", "id"))
+story_panel_snapshot = TableSnapshot(StoryPanel, StoryPanelResponse, order_by=("displayOrder", "id"))
+
+
+@dataclass(frozen=True)
+class SiteSettingsVersion:
+    """One immutable version of the site settings row and its encoded JSON"""
+
+    id: str
+    values: Mapping
+    body: bytes
+
+
+class SiteSettingsStore:
+    """The single site settings row, held in memory as an immutable version.
+
+    Loaded once with a plain SELECT (at startup, or by the first read when
+    startup did not load it); reads never write. Migration 0005 seeds the
+    row. An update builds a new version and swaps it in with a single
+    assignment, so a reader sees the old settings or the new, never a mix.
+    """
+
+    def __init__(self):
+        # (attribute, JSON key) in response field order
+        self.fields = [(name, field.alias or name) for name, field in SiteSettingsResponse.model_fields.items()]
+        self._current = None
+        self._loaded = False
+        # Bumped by every change, so a load racing an update is thrown away
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        # Held across an update's commit and swap, so versions go in commit order
+        self.write_lock = asyncio.Lock()
+
+    def _version(self, row: dict) -> SiteSettingsVersion:
+        row = add_srcsets(row)
+        return SiteSettingsVersion(id=row["id"], values=MappingProxyType(row), body=orjson.dumps(row))
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    async def load(self, db=None):
+        async with self._lock:
+            while not self._loaded:
+                generation = self._generation
+                columns = [getattr(SiteSettings, name) for name, _ in self.fields]
+                async with session_or_own(db) as session:
+                    row = (await session.execute(select(*columns).limit(1))).first()
+                if generation == self._generation:
+                    self._current = self._version(dict(zip((key for _, key in self.fields), row))) if row else None
+                    self._loaded = True
+
+    async def get(self, db=None) -> Optional[SiteSettingsVersion]:
+        """The current version, or None when the row has not been seeded"""
+        if not self._loaded:
+            await self.load(db)
+        return self._current
+
+    def set(self, instance):
+        """Swap in a committed insert or update"""
+        self._generation += 1
+        self._current = self._version({key: getattr(instance, name) for name, key in self.fields})
+        self._loaded = True
+
+    def invalidate(self):
+        """Forget the loaded version; the next read reloads it"""
+        self._generation += 1
+        self._loaded = False
+
+
+site_settings_store = SiteSettingsStore()
@@ -0,0 +1,79 @@
+from collections import OrderedDict, deque
+from fastapi import HTTPException, Request, status
+import math
+import os
+import time
+
+# Sliding-window limits on login/register attempts, checked before any bcrypt work
+LOGIN_THROTTLE_WINDOW = float(os.getenv("LOGIN_THROTTLE_WINDOW", "300"))
+LOGIN_THROTTLE_PER_USERNAME = int(os.getenv("LOGIN_THROTTLE_PER_USERNAME", "10"))
+LOGIN_THROTTLE_PER_IP = int(os.getenv("LOGIN_THROTTLE_PER_IP", "30"))
+# Only trust X-Forwarded-For behind a proxy that sets it (e.g. Vercel)
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() in ("1", "true", "yes")
+
+
+class SlidingWindowLimiter:
+    """At most `limit` hits per key within `window` seconds.
+
+    Keys are kept in LRU order and capped at `max_keys`, so a flood of
+    distinct usernames or addresses cannot grow memory without bound.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 10000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+
+    def hit(self, key: str) -> float:
+        """Record an attempt; returns 0 if allowed, else seconds until one is"""
+        if self.limit <= 0:
+            return 0
+        now = time.monotonic()
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque()
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        else:
+            self._hits.move_to_end(key)
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            return hits[0] + self.window - now
+        hits.append(now)
+        return 0
+
+    def reset(self, key: str):
+        self._hits.pop(key, None)
+
+
+username_limiter = SlidingWindowLimiter(LOGIN_THROTTLE_PER_USERNAME, LOGIN_THROTTLE_WINDOW)
+ip_limiter = SlidingWindowLimiter(LOGIN_THROTTLE_PER_IP, LOGIN_THROTTLE_WINDOW)
+
+
+def client_ip(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def throttle_login(request: Request, username: str):
+    """Reject an authentication attempt over the per-IP or per-username limit"""
+    retry_after = max(
+        ip_limiter.hit(client_ip(request)),
+        username_limiter.hit(username.lower()),
+    )
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def reset_login_throttle(username: str):
+    """Forget a username's attempts after it authenticates successfully"""
+    username_limiter.reset(username.lower())
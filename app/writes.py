@@ -0,0 +1,65 @@
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_dialect
+
+# SQLite gained RETURNING in 3.35; older builds take the UPDATE-then-SELECT path
+UPDATE_RETURNING = get_dialect().update_returning
+
+
+def _not_found(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+
+async def update_row(db: AsyncSession, model, row_id: str, values: dict, not_found_detail: str):
+    """Apply a partial update by id and return the updated ORM row.
+
+    One UPDATE ... RETURNING where supported, otherwise an UPDATE followed
+    by a SELECT. 404 when no row matched.
+    """
+    if not values:
+        # Nothing to write; still 404 for an unknown id
+        row = await db.scalar(select(model).where(model.id == row_id))
+        if row is None:
+            raise _not_found(not_found_detail)
+        return row
+
+    stmt = (
+        update(model)
+        .where(model.id == row_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if UPDATE_RETURNING:
+        row = (await db.scalars(stmt.returning(model))).first()
+        if row is None:
+            raise _not_found(not_found_detail)
+        return row
+
+    result = await db.execute(stmt)
+    if result.rowcount == 0:
+        raise _not_found(not_found_detail)
+    return await db.scalar(select(model).where(model.id == row_id))
+
+
+async def update_row_values(db: AsyncSession, model, row_id: str, values: dict, not_found_detail: str):
+    """Single UPDATE by id when the caller does not need the row back; 404 when no row matched"""
+    result = await db.execute(
+        update(model)
+        .where(model.id == row_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise _not_found(not_found_detail)
+
+
+async def delete_row(db: AsyncSession, model, row_id: str, not_found_detail: str):
+    """Single DELETE by id; 404 when no row matched"""
+    result = await db.execute(
+        delete(model)
+        .where(model.id == row_id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise _not_found(not_found_detail)
@@ -0,0 +1,103 @@
+"""Cold-start cost of the app: time to import main.py and to serve the first request.
+
+Each sample is a fresh interpreter, like a serverless cold start. The
+schema is migrated once up front (python -m app.migrations upgrade), then
+every schema mode is measured against the same seeded database. Pass --max-import-ms and/or
+--max-first-request-ms to fail (exit 1) when the median exceeds a budget,
+e.g. in CI.
+
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --schema-mode skip --max-import-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import percentile, seed_products
+
+
+def run_child(args):
+    start = time.perf_counter()
+    import main
+
+    imported = time.perf_counter()
+
+    import asyncio
+    import httpx
+
+    async def first_request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            request_start = time.perf_counter()
+            response = await client.get(args.path)
+            response.raise_for_status()
+            return time.perf_counter() - request_start
+
+    first = asyncio.run(first_request())
+    heavy = [name for name in ("psycopg2", "bcrypt") if name in sys.modules]
+    print(json.dumps({"import_s": imported - start, "first_request_s": first, "heavy_modules": heavy}))
+
+
+def sample(args, schema_mode: str) -> list:
+    env = {**os.environ, "DATABASE_SCHEMA_MODE": schema_mode}
+    results = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.cold_start", "--child", "--path", args.path],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per schema mode")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--path", default="/api/products", help="first request to serve")
+    parser.add_argument("--schema-mode", choices=["migrate", "check", "skip"], action="append")
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-first-request-ms", type=float)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    if "DATABASE_URL" not in os.environ:
+        workdir = tempfile.mkdtemp(prefix="morris-bench-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        subprocess.run([sys.executable, "-m", "app.migrations", "upgrade"], check=True, capture_output=True)
+        seed_products(args.rows)
+
+    print(f"runs={args.runs} path={args.path}")
+    print(f"{'schema':>7} {'import p50':>11} {'import p95':>11} {'first p50':>10} {'first p95':>10}  heavy imports")
+    failed = False
+    for schema_mode in args.schema_mode or ["migrate", "check", "skip"]:
+        results = sample(args, schema_mode)
+        imports = [result["import_s"] * 1000 for result in results]
+        firsts = [result["first_request_s"] * 1000 for result in results]
+        heavy = sorted({name for result in results for name in result["heavy_modules"]})
+        print(
+            f"{schema_mode:>7} {statistics.median(imports):>11.1f} {percentile(imports, 95):>11.1f} "
+            f"{statistics.median(firsts):>10.1f} {percentile(firsts, 95):>10.1f}  {','.join(heavy) or '-'}"
+        )
+        if args.max_import_ms is not None and statistics.median(imports) > args.max_import_ms:
+            print(f"FAIL: {schema_mode} import p50 exceeds {args.max_import_ms} ms")
+            failed = True
+        if args.max_first_request_ms is not None and statistics.median(firsts) > args.max_first_request_ms:
+            print(f"FAIL: {schema_mode} first request p50 exceeds {args.max_first_request_ms} ms")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Helpers shared by the benchmark scripts"""
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of latencies"""
+    ordered = sorted(samples)
+    index = max(0, int(round(pct / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def seed_products(rows: int):
+    from app.database import SessionLocal
+    from app.models import Product
+
+    db = SessionLocal()
+    try:
+        db.add_all(
+            Product(
+                name=f"Slab {i}",
+                species="Black Walnut",
+                dimensions="96 x 24 x 2 in",
+                origin="Ozarks, Missouri",
+                story="Milled from a storm-felled tree. " * 20,
+                image=f"/images/slab-{i}.jpg",
+                category="slabs",
+                display_order=i,
+            )
+            for i in range(rows)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+# Credentials of the admin user every seeded catalog contains
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench-password"
+SPECIES = ("Black Walnut", "White Oak", "Cherry", "Hard Maple", "Western Red Cedar", "Sycamore")
+CATEGORIES = ("slabs", "lumber", "turning-blanks", "furniture")
+# Tables seed_catalog fills; truncated first on PostgreSQL so every scale starts clean
+CATALOG_TABLES = ("users", "products", "team_members", "story_panels", "contact_messages")
+
+
+def seed_catalog(rows: int, batch: int = 5000):
+    """Fill every catalog table with `rows` synthetic rows (site settings stay a single row).
+
+    Uses executemany INSERTs on the sync engine, so 100k rows per table take
+    seconds rather than minutes. The user `bench` can log in; the others
+    share its password hash so bcrypt runs only once.
+    """
+    from sqlalchemy import insert, text
+    from app.auth import get_password_hash
+    from app.database import engine
+    from app.models import ContactMessage, Product, StoryPanel, TeamMember, User, generate_id
+
+    password = get_password_hash(BENCH_PASSWORD)
+    makers = {
+        User: lambda i: {"username": BENCH_USERNAME if i == 0 else f"user-{i}", "password": password},
+        Product: lambda i: {
+            "name": f"{SPECIES[i % len(SPECIES)]} piece {i}",
+            "species": SPECIES[i % len(SPECIES)],
+            "dimensions": f"{48 + i % 72} x {12 + i % 24} x 2 in",
+            "origin": "Ozarks, Missouri" if i % 2 else "Driftless Area, Wisconsin",
+            "story": f"Milled from a storm-felled {SPECIES[i % len(SPECIES)].lower()} and air dried for {1 + i % 5} years. " * 8,
+            "image": f"/images/piece-{i}.jpg",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "display_order": i,
+        },
+        TeamMember: lambda i: {
+            "name": f"Team Member {i}",
+            "title": "Sawyer",
+            "bio": "Has been milling local hardwoods for over a decade. " * 4,
+            "image": f"/images/team-{i}.jpg",
+            "display_order": i,
+        },
+        StoryPanel: lambda i: {
+            "title": f"Chapter {i}",
+            "description": "From the log yard to the finished slab. " * 6,
+            "image": f"/images/story-{i}.jpg",
+            "display_order": i,
+        },
+        ContactMessage: lambda i: {
+            "name": f"Customer {i}",
+            "email": f"customer{i}@example.com",
+            "company": None if i % 3 else "Example Builders",
+            "message": "Do you have a walnut slab for a 10 foot table? " * 3,
+            "status": ("new", "read", "replied", "archived")[i % 4],
+        },
+    }
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text(f"TRUNCATE {', '.join(CATALOG_TABLES)}"))
+        for model, make_row in makers.items():
+            for start in range(0, rows, batch):
+                connection.execute(
+                    insert(model),
+                    [{"id": generate_id(), **make_row(i)} for i in range(start, min(start + batch, rows))],
+                )
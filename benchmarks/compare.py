@@ -0,0 +1,68 @@
+"""Diff two benchmarks.suite result files, endpoint by endpoint.
+
+Exits 1 when any endpoint's p95 latency regressed by more than --threshold
+percent (and by more than --min-ms, so sub-millisecond noise is ignored).
+
+    python -m benchmarks.compare before.json after.json --threshold 10
+"""
+import argparse
+import json
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_ms: float) -> list:
+    """(scale, transport, endpoint, baseline, current, regressed) for every endpoint in both runs"""
+    rows = []
+    for scale, by_transport in current["results"].items():
+        for transport, endpoints in by_transport.items():
+            if transport == "database":
+                continue
+            before_endpoints = baseline["results"].get(scale, {}).get(transport, {})
+            for name, after in endpoints.items():
+                before = before_endpoints.get(name)
+                if before is None:
+                    continue
+                slower_ms = after["p95_ms"] - before["p95_ms"]
+                regressed = slower_ms > min_ms and slower_ms > before["p95_ms"] * threshold / 100
+                rows.append((scale, transport, name, before, after, regressed))
+    return rows
+
+
+def change(before: float, after: float) -> str:
+    return f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+
+
+def compare_files(baseline_path: str, current_path: str, threshold: float, min_ms: float = 1.0) -> int:
+    """Print the comparison; returns the exit status"""
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    with open(current_path) as file:
+        current = json.load(file)
+
+    print(f"\nbaseline {baseline['meta']['revision']} ({baseline_path}) -> {current['meta']['revision']} ({current_path})")
+    print(f"{'rows':>7} {'transport':<9} {'endpoint':<24} {'req/s':>9} {'p50':>8} {'p95':>8} {'p99':>8}")
+    rows = compare(baseline, current, threshold, min_ms)
+    for scale, transport, name, before, after, regressed in rows:
+        print(
+            f"{scale:>7} {transport:<9} {name:<24} {change(before['throughput'], after['throughput']):>9} "
+            f"{change(before['p50_ms'], after['p50_ms']):>8} {change(before['p95_ms'], after['p95_ms']):>8} "
+            f"{change(before['p99_ms'], after['p99_ms']):>8}{'  REGRESSED' if regressed else ''}"
+        )
+    regressions = sum(row[-1] for row in rows)
+    if regressions:
+        print(f"\n{regressions} endpoint(s) regressed p95 by more than {threshold:g}%")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="p95 regression (%%) that fails")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="ignore p95 changes smaller than this")
+    args = parser.parse_args()
+    raise SystemExit(compare_files(args.baseline, args.current, args.threshold, args.min_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Primary key formats: random UUID4 text vs time-ordered UUIDv7 in compact storage.
+
+Inserts --rows rows in batches into a contact_messages-shaped table keyed
+each way, then times point lookups by random id. Runs against a temporary
+SQLite file per format, or against DATABASE_URL when set (tables are
+created and dropped there).
+
+    python -m benchmarks.ids
+    python -m benchmarks.ids --rows 200000 --lookups 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, create_engine, func, insert, select, text
+from app.ids import CompactUUID, uuid7
+from benchmarks.common import percentile
+
+FORMATS = {
+    "uuid4-text": (String, lambda: str(uuid.uuid4())),
+    "uuid7-compact": (CompactUUID, lambda: str(uuid7())),
+}
+
+
+def make_table(name: str, id_type):
+    return Table(
+        name,
+        MetaData(),
+        Column("id", id_type, primary_key=True),
+        Column("name", String, nullable=False),
+        Column("email", String, nullable=False),
+        Column("message", Text, nullable=False),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    )
+
+
+def storage_bytes(engine, table_name: str, path: str):
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            return connection.scalar(text(f"SELECT pg_total_relation_size('{table_name}')"))
+    return os.path.getsize(path) if path else None
+
+
+def run_format(args, label: str, id_type, new_id):
+    path = None
+    url = os.environ.get("DATABASE_URL")
+    if url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="morris-bench-"), f"{label}.db")
+        url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    table = make_table(f"bench_ids_{label.replace('-', '_')}", id_type)
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+
+    ids = []
+    start = time.perf_counter()
+    with engine.connect() as connection:
+        for batch_start in range(0, args.rows, args.batch):
+            rows = []
+            for i in range(batch_start, min(batch_start + args.batch, args.rows)):
+                row_id = new_id()
+                ids.append(row_id)
+                rows.append({"id": row_id, "name": f"Sender {i}", "email": "sender@example.com", "message": "Hello " * 20})
+            connection.execute(insert(table), rows)
+            connection.commit()
+    insert_seconds = time.perf_counter() - start
+
+    rng = random.Random(7)
+    latencies = []
+    stmt = select(table.c.id, table.c.name)
+    with engine.connect() as connection:
+        for row_id in rng.choices(ids, k=args.lookups):
+            lookup_start = time.perf_counter()
+            row = connection.execute(stmt.where(table.c.id == row_id)).first()
+            latencies.append(time.perf_counter() - lookup_start)
+            assert row is not None and row.id == row_id
+
+    size = storage_bytes(engine, table.name, path)
+    if path is None:
+        table.drop(engine)
+    engine.dispose()
+    return {
+        "insert_rows_per_s": args.rows / insert_seconds,
+        "lookup_p50_us": statistics.median(latencies) * 1e6,
+        "lookup_p99_us": percentile(latencies, 99) * 1e6,
+        "size_mib": size / (1024 * 1024) if size else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1000, help="rows per INSERT transaction")
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"rows={args.rows} batch={args.batch} lookups={args.lookups}")
+    print(f"{'format':>14} {'inserts/s':>10} {'lookup p50 us':>14} {'lookup p99 us':>14} {'size MiB':>9}")
+    for label, (id_type, new_id) in FORMATS.items():
+        result = run_format(args, label, id_type, new_id)
+        print(
+            f"{label:>14} {result['insert_rows_per_s']:>10.0f} {result['lookup_p50_us']:>14.1f} "
+            f"{result['lookup_p99_us']:>14.1f} {result['size_mib']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Concurrent GET /api/products load test.
+
+Seeds a throwaway SQLite database, then drives the app in-process over ASGI
+at increasing concurrency. While the product reads are in flight, a probe
+keeps hitting /health: if database work blocked the event loop, the probe's
+p99 would climb with the product load instead of staying flat.
+
+    python -m benchmarks.products_load --mode async
+    python -m benchmarks.products_load --mode threadpool
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from benchmarks.common import percentile, seed_products
+
+
+async def run_level(client, concurrency: int, total: int):
+    product_latencies = []
+    probe_latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async def read_products():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get("/api/products")
+            product_latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/health")
+            probe_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.005)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(read_products() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return elapsed, product_latencies, probe_latencies
+
+
+async def main_async(args):
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up imports, connections and caches before measuring
+        await run_level(client, 1, 10)
+
+        print(f"mode={args.mode} rows={args.rows}")
+        print(f"{'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'probe p50':>10} {'probe p99':>10}")
+        for concurrency in args.concurrency:
+            elapsed, latencies, probes = await run_level(client, concurrency, args.requests)
+            print(
+                f"{concurrency:>5} {len(latencies) / elapsed:>8.1f} "
+                f"{statistics.median(latencies) * 1000:>8.2f} {percentile(latencies, 99) * 1000:>8.2f} "
+                f"{statistics.median(probes) * 1000:>10.2f} {percentile(probes, 99) * 1000:>10.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["async", "threadpool"], default="async")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=400, help="requests per concurrency level")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(part) for part in value.split(",")],
+        default=[1, 8, 32, 64],
+    )
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="morris-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DATABASE_SESSION_MODE"] = args.mode
+
+    import main as app_main  # noqa: F401  creates the tables
+
+    seed_products(args.rows)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Mixed read/write throughput on SQLite, default profile vs production profile.
+
+Each profile runs in a fresh subprocess (the profile is read at import time)
+against its own seeded database, with the response cache disabled so every
+read reaches SQLite. Concurrent clients issue paginated product reads mixed
+with product PATCHes and contact submissions.
+
+    python -m benchmarks.sqlite_mixed
+    python -m benchmarks.sqlite_mixed --concurrency 64 --write-ratio 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import percentile, seed_products
+
+
+async def run_workload(args):
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/register", json={"username": "bench", "password": "bench"})
+        response.raise_for_status()
+        product_ids = [product["id"] for product in (await client.get("/api/products")).json()]
+
+        latencies = {"read": [], "write": []}
+        errors = 0
+        semaphore = asyncio.Semaphore(args.concurrency)
+        rng = random.Random(42)
+
+        async def one_request(i: int):
+            nonlocal errors
+            is_write = rng.random() < args.write_ratio
+            async with semaphore:
+                start = time.perf_counter()
+                if not is_write:
+                    response = await client.get("/api/products", params={"limit": 20})
+                elif i % 2:
+                    response = await client.patch(
+                        f"/api/products/{rng.choice(product_ids)}", json={"displayOrder": i}
+                    )
+                else:
+                    response = await client.post(
+                        "/api/contact", json={"name": "Bench", "email": "bench@example.com", "message": "Hi"}
+                    )
+                latencies["write" if is_write else "read"].append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_request(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+    result = {"throughput": args.requests / elapsed, "errors": errors}
+    for kind, samples in latencies.items():
+        if samples:
+            result[f"{kind}_p50_ms"] = statistics.median(samples) * 1000
+            result[f"{kind}_p99_ms"] = percentile(samples, 99) * 1000
+    return result
+
+
+def run_child(args):
+    workdir = tempfile.mkdtemp(prefix="morris-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["SQLITE_PROFILE"] = args.profile
+    os.environ["RESPONSE_CACHE_TTL"] = "0"
+    os.environ["LOGIN_THROTTLE_PER_IP"] = "0"
+
+    import logging
+    import main as app_main  # noqa: F401  creates the tables
+
+    logging.disable(logging.CRITICAL)
+    seed_products(args.rows)
+    print(json.dumps(asyncio.run(run_workload(args))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--profile", choices=["default", "production"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_child(args)
+        return
+
+    print(
+        f"rows={args.rows} requests={args.requests} concurrency={args.concurrency} "
+        f"write_ratio={args.write_ratio}"
+    )
+    print(
+        f"{'profile':>10} {'req/s':>8} {'errors':>7} {'read p50':>9} {'read p99':>9} "
+        f"{'write p50':>10} {'write p99':>10}"
+    )
+    for profile in ("default", "production"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite_mixed", "--profile", profile]
+            + ["--rows", str(args.rows), "--requests", str(args.requests)]
+            + ["--concurrency", str(args.concurrency), "--write-ratio", str(args.write_ratio)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{profile:>10} {result['throughput']:>8.1f} {result['errors']:>7} "
+            f"{result.get('read_p50_ms', 0):>9.2f} {result.get('read_p99_ms', 0):>9.2f} "
+            f"{result.get('write_p50_ms', 0):>10.2f} {result.get('write_p99_ms', 0):>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Per-endpoint throughput and p50/p95/p99 latency at several catalog sizes.
+
+For each --scales entry a fresh subprocess seeds a database with that many
+rows in every table (a temporary SQLite file, or --database-url, e.g. a
+local PostgreSQL, truncated first), then measures every endpoint in turn:
+public reads, login, contact submission and admin writes. Each scale runs
+in-process over ASGI and over real HTTP against a uvicorn server. Results
+are written as JSON; pass --baseline to compare against an earlier run
+(see benchmarks.compare).
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --scales 100,10000 --transports asgi --output before.json
+    python -m benchmarks.suite --baseline before.json --threshold 10
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import BENCH_PASSWORD, BENCH_USERNAME, CATEGORIES, SPECIES, percentile, seed_catalog
+
+SEARCH_WORDS = [species.split()[-1].lower() for species in SPECIES]
+
+
+def endpoint_requests(product_ids: list) -> dict:
+    """Endpoint name -> function of the request number returning (method, path, JSON body).
+
+    Reads come first so the writes at the end do not disturb them.
+    """
+    new_product = {
+        "name": "Bench slab",
+        "species": "Black Walnut",
+        "dimensions": "96 x 24 x 2 in",
+        "origin": "Ozarks, Missouri",
+        "story": "Created by the benchmark.",
+        "image": "/images/bench.jpg",
+        "category": "slabs",
+    }
+    return {
+        "products_page": lambda i: ("GET", "/api/products?limit=50", None),
+        "products_category_page": lambda i: ("GET", f"/api/products?category={CATEGORIES[i % len(CATEGORIES)]}&limit=50", None),
+        "products_projected_page": lambda i: ("GET", "/api/products?fields=name,image,category&limit=50", None),
+        "products_full": lambda i: ("GET", "/api/products", None),
+        "products_search": lambda i: ("GET", f"/api/products/search?q={SEARCH_WORDS[i % len(SEARCH_WORDS)]}", None),
+        "team_members": lambda i: ("GET", "/api/team-members", None),
+        "story_panels": lambda i: ("GET", "/api/story-panels", None),
+        "site_settings": lambda i: ("GET", "/api/site-settings", None),
+        "bootstrap": lambda i: ("GET", "/api/bootstrap", None),
+        "contact_inbox_page": lambda i: ("GET", "/api/contact-messages?limit=50", None),
+        "login": lambda i: ("POST", "/api/login", {"username": BENCH_USERNAME, "password": BENCH_PASSWORD}),
+        "contact_submit": lambda i: (
+            "POST",
+            "/api/contact",
+            {"name": "Bench", "email": "bench@example.com", "message": f"Benchmark message {i}"},
+        ),
+        "product_update": lambda i: ("PATCH", f"/api/products/{product_ids[i % len(product_ids)]}", {"dimensions": f"{i} in"}),
+        "product_create": lambda i: ("POST", "/api/products", {**new_product, "displayOrder": i}),
+    }
+
+
+async def measure(client, make_request, requests: int, concurrency: int, warmup: int) -> dict:
+    async def send(i: int):
+        method, path, body = make_request(i)
+        return await client.request(method, path, json=body)
+
+    for i in range(warmup):
+        await send(i)
+
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await send(warmup + i)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def run_endpoints(client, args) -> dict:
+    response = await client.post("/api/login", json={"username": BENCH_USERNAME, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    page = (await client.get("/api/products?limit=200&fields=name")).json()
+    requests = endpoint_requests([item["id"] for item in page["items"]])
+
+    results = {}
+    for name, make_request in requests.items():
+        if args.endpoints and name not in args.endpoints:
+            continue
+        results[name] = await measure(client, make_request, args.requests, args.concurrency, args.warmup)
+        print(f"  {name:<24} {results[name]['throughput']:>9.1f} req/s  p95 {results[name]['p95_ms']:>8.2f} ms", file=sys.stderr)
+    return results
+
+
+async def run_asgi(args) -> dict:
+    import httpx
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            return await run_endpoints(client, args)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_http(args) -> dict:
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)]
+        + ["--workers", str(args.workers), "--log-level", "warning"],
+        # The schema is already migrated and seeded
+        env={**os.environ, "DATABASE_SCHEMA_MODE": "skip"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    (await client.get("/health")).raise_for_status()
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline or server.poll() is not None:
+                        raise RuntimeError("uvicorn did not start")
+                    await asyncio.sleep(0.1)
+            return await run_endpoints(client, args)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run_child(args):
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        workdir = tempfile.mkdtemp(prefix="morris-bench-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["LOGIN_THROTTLE_PER_IP"] = "0"
+    os.environ["LOGIN_THROTTLE_PER_USERNAME"] = "0"
+    if args.no_cache:
+        os.environ["RESPONSE_CACHE_TTL"] = "0"
+
+    import logging
+    import main  # noqa: F401  migrates the schema
+
+    logging.disable(logging.CRITICAL)
+    start = time.perf_counter()
+    seed_catalog(args.rows)
+    print(f"rows={args.rows}: seeded in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    from app.database import get_dialect
+
+    results = {"database": get_dialect().name}
+    for transport in args.transports:
+        print(f"rows={args.rows} transport={transport}", file=sys.stderr)
+        results[transport] = asyncio.run(run_asgi(args) if transport == "asgi" else run_http(args))
+    print(json.dumps(results))
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict):
+    for scale, by_transport in results.items():
+        for transport, endpoints in by_transport.items():
+            if transport == "database":
+                continue
+            print(f"\nrows={scale} transport={transport} database={by_transport['database']}")
+            print(f"{'endpoint':<24} {'req/s':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+            for name, result in endpoints.items():
+                print(
+                    f"{name:<24} {result['throughput']:>9.1f} {result['errors']:>7} {result['p50_ms']:>9.2f} "
+                    f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=lambda value: [int(part) for part in value.split(",")], default=[100, 10_000, 100_000])
+    parser.add_argument("--transports", type=lambda value: value.split(","), default=["asgi", "http"])
+    parser.add_argument("--endpoints", type=lambda value: value.split(","), help="only these endpoints")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per endpoint first")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the http transport")
+    parser.add_argument("--database-url", help="benchmark this database (its catalog tables are truncated) instead of SQLite")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache so reads reach the database")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="p95 regression (%%) that fails the comparison")
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    started = datetime.datetime.now(datetime.timezone.utc)
+    results = {}
+    for rows in args.scales:
+        command = [sys.executable, "-m", "benchmarks.suite", "--child", "--rows", str(rows)]
+        for option in ("transports", "endpoints"):
+            if getattr(args, option):
+                command += [f"--{option}", ",".join(getattr(args, option))]
+        for option in ("requests", "concurrency", "warmup", "workers", "database_url"):
+            if getattr(args, option) is not None:
+                command += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+        if args.no_cache:
+            command.append("--no-cache")
+        output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+        results[str(rows)] = json.loads(output.strip().splitlines()[-1])
+
+    document = {
+        "meta": {
+            "started_at": started.isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "session_mode": os.getenv("DATABASE_SESSION_MODE", "async"),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "response_cache": not args.no_cache,
+        },
+        "results": results,
+    }
+    output_path = args.output or os.path.join("benchmarks", "results", f"{started:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as file:
+        json.dump(document, file, indent=2)
+
+    print_results(results)
+    print(f"\nwrote {output_path}")
+    if args.baseline:
+        from benchmarks.compare import compare_files
+
+        sys.exit(compare_files(args.baseline, output_path, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,95 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
+import asyncio
 import os
 import logging
-from app.database import engine, Base
+import time
+from app.compression import CompressionMiddleware
+from app.cache import response_cache
+from app.database import get_pool_status, session_scope
+from app.images import image_pipeline
+from app.ingest import CONTACT_INGEST_MODE, contact_ingestor
+from app.invalidation import invalidation_bus
+from app.pool import DATABASE_POOL_MODE
+from app.replicas import ReadYourWritesMiddleware, replica_router
+from app.snapshots import site_settings_store
+from app.metrics import MetricsMiddleware, metrics_registry
+from app.migrations import report_pending as report_pending_migrations, upgrade as upgrade_schema
 from app.routers import (
     auth,
+    bootstrap,
     products,
     team_members,
     story_panels,
     site_settings,
     contact_messages,
+    images,
 )
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables (with error handling)
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
-except Exception as e:
-    logger.error(f"Error creating database tables: {e}")
-    # Continue anyway - tables might already exist or connection will be retried
+# "migrate" applies pending migrations on import; "check" only logs pending
+# ones (one query, no DDL); "skip" does no schema work and does not preload
+# site settings, leaving a cold start with one query before serving: the
+# cache_versions read in invalidation_bus.start() (none with
+# CACHE_INVALIDATION=off). With check/skip run
+# `python -m app.migrations upgrade` as a deploy step
+DATABASE_SCHEMA_MODE = os.getenv("DATABASE_SCHEMA_MODE", "migrate").lower()
 
-app = FastAPI(title="Morris Timber Co API", version="1.0.0")
+if DATABASE_SCHEMA_MODE in ("migrate", "create"):
+    # Create or upgrade database tables (with error handling)
+    try:
+        upgrade_schema()
+        logger.info("Database tables created successfully")
+    except Exception as e:
+        logger.error(f"Error creating database tables: {e}")
+        # Continue anyway - tables might already exist or connection will be retried
+elif DATABASE_SCHEMA_MODE == "check":
+    try:
+        report_pending_migrations()
+    except Exception as e:
+        logger.error(f"Error checking database migrations: {e}")
+elif DATABASE_SCHEMA_MODE != "skip":
+    raise ValueError(f"Unknown DATABASE_SCHEMA_MODE: {DATABASE_SCHEMA_MODE}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and drain background workers around the server's lifetime"""
+    # Before anything is cached, so no write can slip between a load and the first poll
+    await invalidation_bus.start()
+    await replica_router.start()
+    if DATABASE_SCHEMA_MODE != "skip":
+        # Load the site settings into memory now rather than on the first page load
+        try:
+            await site_settings_store.load()
+        except Exception as e:
+            logger.warning(f"Could not load site settings at startup: {e}")
+    if CONTACT_INGEST_MODE == "queue":
+        await contact_ingestor.start()
+    yield
+    if CONTACT_INGEST_MODE == "queue":
+        await contact_ingestor.stop()
+    await invalidation_bus.stop()
+    await replica_router.stop()
+    image_pipeline.shutdown()
+
+
+app = FastAPI(title="Morris Timber Co API", version="1.0.0", lifespan=lifespan)
 
 # Get secret key from environment variable or use default (for development)
 SECRET_KEY = os.getenv("SESSION_SECRET_KEY", "your-secret-key-change-this-in-production")
 
+# After a write, send that client's reads to the primary (inside the session middleware, which it reads)
+if replica_router.enabled:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 # Add session middleware (must be before CORS)
 app.add_middleware(
     SessionMiddleware,
@@ -47,6 +107,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON responses (outermost, so it sees final bodies)
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency, SQL counts and Server-Timing (outermost, so it times everything)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api", tags=["Authentication"])
 app.include_router(products.router, prefix="/api", tags=["Products"])
@@ -54,6 +120,8 @@ app.include_router(team_members.router, prefix="/api", tags=["Team Members"])
 app.include_router(story_panels.router, prefix="/api", tags=["Story Panels"])
 app.include_router(site_settings.router, prefix="/api", tags=["Site Settings"])
 app.include_router(contact_messages.router, prefix="/api", tags=["Contact Messages"])
+app.include_router(bootstrap.router, prefix="/api", tags=["Bootstrap"])
+app.include_router(images.router, prefix="/api", tags=["Images"])
 
 
 @app.get("/")
@@ -67,6 +135,61 @@ async def health_check():
     return {"status": "ok", "service": "Morris Timber Co API"}
 
 
+@app.get("/health/pool")
+async def pool_status():
+    """Connection pool occupancy, checkout wait times and overflow, for sizing the pool"""
+    return {"mode": DATABASE_POOL_MODE, "pools": get_pool_status(), "replicas": replica_router.status()}
+
+
+# Seconds the readiness probe waits for the database before reporting unavailable
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "2"))
+
+
+async def ping_database():
+    async with session_scope() as db:
+        await db.execute(text("SELECT 1"))
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: 200 only when the database answers a trivial query in time"""
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(ping_database(), READINESS_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Readiness check failed: {e!r}")
+        return JSONResponse(status_code=503, content={"status": "unavailable", "database": "error"})
+    return {"status": "ready", "database": "ok", "latencyMs": round((time.perf_counter() - start) * 1000, 1)}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-route latency histograms, SQL statement counts, DB time, pools and cache"""
+    pools = get_pool_status()
+    replicas = replica_router.status()
+    pools.update({name: replica["pool"] for name, replica in replicas.items()})
+    cache = response_cache.stats()
+    extra = [
+        ("db_pool_checked_out", "gauge", "Connections currently checked out",
+         [({"pool": name}, pool["checked_out"]) for name, pool in pools.items() if "checked_out" in pool]),
+        ("db_pool_checkout_timeouts_total", "counter", "Checkouts that timed out waiting for a connection",
+         [({"pool": name}, pool["timeouts"]) for name, pool in pools.items() if "timeouts" in pool]),
+        ("db_pool_wait_seconds_total", "counter", "Time spent waiting for a pooled connection",
+         [({"pool": name}, pool["wait_seconds_total"]) for name, pool in pools.items() if "wait_seconds_total" in pool]),
+        ("db_replica_healthy", "gauge", "1 while a read replica is in rotation",
+         [({"replica": name}, int(replica["healthy"])) for name, replica in replicas.items()]),
+        ("db_replica_lag_seconds", "gauge", "Replication lag seen by the last health check",
+         [({"replica": name}, replica["lag_seconds"]) for name, replica in replicas.items() if replica["lag_seconds"] is not None]),
+        ("db_replica_sessions_open", "gauge", "Sessions this worker has open on a read replica",
+         [({"replica": name}, replica["in_flight"]) for name, replica in replicas.items()]),
+        ("response_cache_entries", "gauge", "Responses held in the response cache", [({}, cache["entries"])]),
+        ("response_cache_bytes", "gauge", "Bytes held in the response cache", [({}, cache["bytes"])]),
+        ("response_cache_hits_total", "counter", "Response cache hits", [({}, cache["hits"])]),
+        ("response_cache_misses_total", "counter", "Response cache misses", [({}, cache["misses"])]),
+    ]
+    return Response(metrics_registry.render(extra), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8007)
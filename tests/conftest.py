@@ -0,0 +1,57 @@
+import asyncio
+import itertools
+import os
+import tempfile
+import pytest
+
+# Settings are read when app modules are imported, so set them first
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='morris-tests-'), 'test.db')}"
+os.environ.setdefault("CACHE_INVALIDATION", "off")
+os.environ.setdefault("LOGIN_THROTTLE_PER_IP", "0")
+os.environ.setdefault("LOGIN_THROTTLE_PER_USERNAME", "0")
+
+import httpx  # noqa: E402
+from main import app  # noqa: E402
+
+PRODUCT = {
+    "name": "Slab",
+    "species": "Black Walnut",
+    "dimensions": "96 x 24 x 2 in",
+    "origin": "Ozarks, Missouri",
+    "story": "Milled from a storm-felled tree.",
+    "image": "/images/slab.jpg",
+    "category": "slabs",
+}
+
+_usernames = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    # One loop for the whole run: pooled async connections belong to the loop that opened them
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def api(event_loop):
+    """api(test) runs `await test(client)` against the app and returns its result.
+
+    With admin=True the client is logged in as a freshly registered user.
+    """
+
+    def run(test, admin: bool = False):
+        async def main():
+            async with app.router.lifespan_context(app):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    if admin:
+                        credentials = {"username": f"admin-{next(_usernames)}", "password": "admin-password"}
+                        response = await client.post("/api/register", json=credentials)
+                        assert response.status_code == 200, response.text
+                    return await test(client)
+
+        return event_loop.run_until_complete(main())
+
+    return run
@@ -0,0 +1,26 @@
+import app.replicas
+from app.snapshots import product_snapshot, site_settings_store, story_panel_snapshot, team_member_snapshot
+from conftest import PRODUCT
+
+
+def test_cold_bootstrap_loads_every_section_from_one_session(api, monkeypatch):
+    async def test(client):
+        response = await client.post("/api/products", json=PRODUCT)
+        assert response.status_code == 201, response.text
+        for source in (site_settings_store, product_snapshot, team_member_snapshot, story_panel_snapshot):
+            source.invalidate()
+
+        opened = []
+        session_scope = app.replicas.session_scope
+
+        def counting_session_scope(*args, **kwargs):
+            opened.append(kwargs)
+            return session_scope(*args, **kwargs)
+
+        monkeypatch.setattr(app.replicas, "session_scope", counting_session_scope)
+        response = await client.get("/api/bootstrap")
+        assert response.status_code == 200, response.text
+        assert len(opened) == 1
+        assert response.json()["products"]
+
+    api(test, admin=True)
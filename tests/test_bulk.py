@@ -0,0 +1,71 @@
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models import Product, generate_id
+from app.snapshots import product_snapshot
+from conftest import PRODUCT
+
+
+def stored_products(ids: list) -> dict:
+    """id -> (name, display_order), read from the database rather than the snapshot"""
+    with SessionLocal() as db:
+        rows = db.execute(select(Product.id, Product.name, Product.display_order).where(Product.id.in_(ids))).all()
+    return {row.id: (row.name, row.display_order) for row in rows}
+
+
+async def create_products(client, count: int) -> list:
+    response = await client.post(
+        "/api/products/bulk",
+        json=[{**PRODUCT, "name": f"Bulk {index}", "displayOrder": index} for index in range(count)],
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_bulk_create_returns_ids_and_updates_snapshot(api):
+    async def test(client):
+        # Load the snapshot first, so the create has to patch it
+        assert (await client.get("/api/products")).status_code == 200
+        assert product_snapshot.loaded
+
+        created = await create_products(client, 3)
+        ids = [item["id"] for item in created]
+        assert all(ids) and len(set(ids)) == 3
+        assert [item["name"] for item in created] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+        assert set(stored_products(ids)) == set(ids)
+
+        snapshot_ids = {row["id"] for row in await product_snapshot.rows()}
+        assert set(ids) <= snapshot_ids
+        listed = {item["id"] for item in (await client.get("/api/products")).json()}
+        assert set(ids) <= listed
+
+    api(test, admin=True)
+
+
+def test_bulk_update_with_unknown_id_changes_nothing(api):
+    async def test(client):
+        ids = [item["id"] for item in await create_products(client, 2)]
+        before = stored_products(ids)
+
+        response = await client.patch(
+            "/api/products/bulk",
+            json=[{"id": ids[0], "name": "Changed"}, {"id": ids[1], "name": "Changed"}, {"id": generate_id(), "name": "Changed"}],
+        )
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Product not found"
+        assert stored_products(ids) == before
+
+    api(test, admin=True)
+
+
+def test_reorder_with_unknown_id_changes_nothing(api):
+    async def test(client):
+        ids = [item["id"] for item in await create_products(client, 3)]
+        before = stored_products(ids)
+
+        # The UPDATE matches the known rows; the short rowcount must roll it back
+        response = await client.post("/api/products/reorder", json={"ids": [ids[2], generate_id(), ids[1], ids[0]]})
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Product not found"
+        assert stored_products(ids) == before
+
+    api(test, admin=True)
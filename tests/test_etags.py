@@ -0,0 +1,29 @@
+from app.cache import ContentVersions
+
+
+def test_etags_match_across_processes_once_versions_are_shared():
+    first, second = ContentVersions(), ContentVersions()
+    # Not yet synced with cache_versions: each process's ETags are its own
+    assert first.etag(("products",), "/api/products") != second.etag(("products",), "/api/products")
+
+    first.sync({"products": 3})
+    second.sync({"products": 3})
+    assert first.etag(("products",), "/api/products") == second.etag(("products",), "/api/products")
+    # Tables missing from cache_versions were never written, so both are at version 0
+    assert first.etag(("products", "team_members"), "/api/bootstrap") == second.etag(
+        ("products", "team_members"), "/api/bootstrap"
+    )
+
+
+def test_own_commit_changes_the_etag_only_after_the_caches_do():
+    versions = ContentVersions()
+    versions.sync({"products": 3})
+    before = versions.etag(("products",), "/api/products")
+
+    versions.committed("products", 4)
+    assert versions.etag(("products",), "/api/products") == before
+
+    versions.bump("products")
+    other = ContentVersions()
+    other.sync({"products": 4})
+    assert versions.etag(("products",), "/api/products") == other.etag(("products",), "/api/products")
@@ -0,0 +1,65 @@
+from app.pagination import encode_cursor
+from conftest import PRODUCT
+
+
+def test_category_pages_cross_display_order_ties(api):
+    async def test(client):
+        category = "tied-pages"
+        created = []
+        # Five rows share displayOrder 1, so only the id keeps the pages apart
+        for display_order in (1, 0, 1, 2, 1, 1, 1):
+            response = await client.post(
+                "/api/products", json={**PRODUCT, "category": category, "displayOrder": display_order}
+            )
+            assert response.status_code == 201, response.text
+            created.append(response.json())
+        other = await client.post("/api/products", json={**PRODUCT, "category": "elsewhere", "displayOrder": 1})
+        assert other.status_code == 201, other.text
+
+        listed = (await client.get(f"/api/products?category={category}")).json()
+        assert sorted(item["id"] for item in listed) == sorted(item["id"] for item in created)
+
+        paged = []
+        cursor = None
+        while True:
+            url = f"/api/products?category={category}&limit=2" + (f"&cursor={cursor}" if cursor else "")
+            response = await client.get(url)
+            assert response.status_code == 200, response.text
+            page = response.json()
+            assert len(page["items"]) <= 2
+            paged += page["items"]
+            cursor = page["nextCursor"]
+            if cursor is None:
+                break
+        assert [item["id"] for item in paged] == [item["id"] for item in listed]
+        assert [item["displayOrder"] for item in paged] == [0, 1, 1, 1, 1, 1, 2]
+
+    api(test, admin=True)
+
+
+def test_fields_projection_omits_story(api):
+    async def test(client):
+        response = await client.post("/api/products", json={**PRODUCT, "category": "projected"})
+        assert response.status_code == 201, response.text
+
+        response = await client.get("/api/products?category=projected&fields=name,image&limit=10")
+        assert response.status_code == 200, response.text
+        [item] = response.json()["items"]
+        assert "story" not in item
+        assert item["name"] == PRODUCT["name"]
+        assert {"id", "displayOrder", "image"} <= item.keys()
+
+    api(test, admin=True)
+
+
+def test_bad_cursors_are_rejected(api):
+    async def test(client):
+        response = await client.get("/api/products?limit=2&cursor=not-a-cursor")
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+        response = await client.get(f"/api/products?cursor={encode_cursor((0, 'x'))}")
+        assert response.status_code == 400
+        assert response.json()["detail"] == "cursor requires limit"
+
+    api(test, admin=True)
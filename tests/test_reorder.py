@@ -0,0 +1,27 @@
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models import Product
+from conftest import PRODUCT
+
+
+def test_reorder_stores_positions(api):
+    async def test(client):
+        ids = []
+        for display_order in range(3):
+            response = await client.post("/api/products", json={**PRODUCT, "displayOrder": display_order})
+            assert response.status_code == 201, response.text
+            ids.append(response.json()["id"])
+
+        response = await client.post("/api/products/reorder", json={"ids": ids[::-1]})
+        assert response.status_code == 200, response.text
+
+        # Read back from the database, not the snapshot the handler patches
+        with SessionLocal() as db:
+            stored = dict(db.execute(select(Product.id, Product.display_order).where(Product.id.in_(ids))).all())
+        assert [stored[product_id] for product_id in ids[::-1]] == [0, 1, 2]
+
+        response = await client.patch("/api/products/bulk", json=[{"id": ids[0], "name": "Renamed"}])
+        assert response.status_code == 200, response.text
+        assert response.json()[0]["displayOrder"] == 2
+
+    api(test, admin=True)
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import select
+from app import writes
+from app.database import SessionLocal
+from app.models import ContactMessage, generate_id
+from conftest import PRODUCT
+
+# A well-formed id that matches no row, and one that is not an id at all (binds as NULL)
+MISSING_IDS = [generate_id(), "not-an-id"]
+
+
+@pytest.fixture(params=[True, False], ids=["returning", "update-select"])
+def update_returning(request, monkeypatch):
+    monkeypatch.setattr(writes, "UPDATE_RETURNING", request.param)
+
+
+def test_create_returns_generated_fields(api):
+    async def test(client):
+        response = await client.post("/api/products", json=PRODUCT)
+        assert response.status_code == 201, response.text
+        created = response.json()
+        assert created["id"] and created["displayOrder"] == 0
+        assert created["name"] == PRODUCT["name"]
+
+    api(test, admin=True)
+
+
+@pytest.mark.parametrize("missing_id", MISSING_IDS)
+def test_update_and_delete_unknown_product(api, update_returning, missing_id):
+    async def test(client):
+        response = await client.patch(f"/api/products/{missing_id}", json={"name": "Renamed"})
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Product not found"
+
+        # No values to write still checks the id
+        response = await client.patch(f"/api/products/{missing_id}", json={})
+        assert response.status_code == 404
+
+        response = await client.delete(f"/api/products/{missing_id}")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Product not found"
+
+    api(test, admin=True)
+
+
+def test_update_and_delete_product(api, update_returning):
+    async def test(client):
+        product_id = (await client.post("/api/products", json=PRODUCT)).json()["id"]
+
+        response = await client.patch(f"/api/products/{product_id}", json={"name": "Renamed"})
+        assert response.status_code == 200, response.text
+        assert response.json()["name"] == "Renamed"
+        assert response.json()["story"] == PRODUCT["story"]
+
+        assert (await client.delete(f"/api/products/{product_id}")).status_code == 200
+        assert (await client.delete(f"/api/products/{product_id}")).status_code == 404
+
+    api(test, admin=True)
+
+
+@pytest.mark.parametrize("missing_id", MISSING_IDS)
+def test_contact_message_unknown_id(api, missing_id):
+    async def test(client):
+        response = await client.patch(f"/api/contact-messages/{missing_id}/status", json={"status": "read"})
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Contact message not found"
+
+        response = await client.delete(f"/api/contact-messages/{missing_id}")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Contact message not found"
+
+    api(test, admin=True)
+
+
+def test_contact_message_status(api):
+    async def test(client):
+        message = {"name": "Ada", "email": "ada@example.com", "message": "Do you ship walnut slabs?"}
+        assert (await client.post("/api/contact", json=message)).status_code == 200
+        with SessionLocal() as db:
+            message_id = db.scalar(
+                select(ContactMessage.id).where(ContactMessage.message == message["message"]).limit(1)
+            )
+
+        response = await client.patch(f"/api/contact-messages/{message_id}/status", json={"status": "read"})
+        assert response.status_code == 200, response.text
+        with SessionLocal() as db:
+            assert db.get(ContactMessage, message_id).status == "read"
+
+    api(test, admin=True)